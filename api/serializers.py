@@ -0,0 +1,87 @@
+from django.core.files.storage import default_storage
+
+
+class InvalidFields(Exception):
+    pass
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class ValuesSerializer:
+    """
+    Сериализация строк из values(): без экземпляров моделей и шаблонов.
+
+    fields — имя в ответе и путь в ORM, ?fields= выбирает подмножество,
+    и в SELECT попадают только нужные колонки.
+    """
+
+    fields = {}
+    converters = {}
+
+    def __init__(self, requested=None):
+        names = [
+            name.strip() for name in (requested or '').split(',')
+            if name.strip()
+        ]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidFields(unknown)
+        self.names = names or list(self.fields)
+
+    def values(self, queryset, extra=()):
+        lookups = {self.fields[name] for name in self.names}
+        return queryset.values(*lookups.union(extra))
+
+    def dump(self, row):
+        data = {}
+        for name in self.names:
+            value = row[self.fields[name]]
+            convert = self.converters.get(name)
+            data[name] = convert(value) if convert else value
+        return data
+
+
+class PostSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comment_count': 'comment_count',
+    }
+    converters = {'image': image_url}
+
+
+class CommentSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }
+
+
+class GroupSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    }
+
+
+class ProfileSerializer(ValuesSerializer):
+    fields = {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'posts_count': 'posts_count',
+        'followers_count': 'followers_count',
+        'following_count': 'following_count',
+        'following': 'following',
+    }
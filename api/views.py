@@ -0,0 +1,171 @@
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from posts.authors import author_summary
+from posts.models import Comment, Group, Post, User
+from posts.pagecache import (anonymous_page_cache, group_scope, index_scope,
+                             profile_scope)
+from posts.paginators import (COMMENT_ORDERING, FEED_ORDERING,
+                              POSTS_PER_PAGE, CursorPaginator)
+from posts.timeline import get_timeline_backend
+
+from .serializers import (CommentSerializer, GroupSerializer, InvalidFields,
+                          PostSerializer, ProfileSerializer)
+
+# Компактный JSON: без пробелов и \u-экранирования кириллицы
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+MAX_LIMIT = 100
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(view):
+    """Только чтение, ошибки — в JSON, а не HTML-страницей."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return json_response({'detail': 'Не найдено'}, status=404)
+        except InvalidFields as error:
+            return json_response(
+                {'detail': 'Неизвестные поля: ' + ', '.join(error.args[0])},
+                status=400
+            )
+    return wrapper
+
+
+def serializer_for(request, serializer_class):
+    return serializer_class(request.GET.get('fields'))
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        limit = POSTS_PER_PAGE
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def page_response(request, queryset, serializer, ordering=FEED_ORDERING,
+                  keys=None):
+    """Курсорная страница: ?cursor= и ?limit=, ссылки next/previous."""
+    keys = tuple(keys or (field.lstrip('-') for field in ordering))
+    paginator = CursorPaginator(
+        serializer.values(queryset, extra=keys),
+        page_limit(request),
+        ordering,
+        keys
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return json_response({
+        'results': [serializer.dump(row) for row in page],
+        'next': page.next_cursor or None,
+        'previous': page.previous_cursor or None,
+    })
+
+
+@api_view
+@anonymous_page_cache(index_scope)
+def posts(request):
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return page_response(
+        request, queryset, serializer_for(request, PostSerializer)
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    serializer = serializer_for(request, PostSerializer)
+    row = serializer.values(Post.objects.filter(pk=post_id)).first()
+    if row is None:
+        raise Http404
+    return json_response(serializer.dump(row))
+
+
+@api_view
+def post_comments(request, post_id):
+    serializer = serializer_for(request, CommentSerializer)
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return page_response(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        serializer,
+        COMMENT_ORDERING
+    )
+
+
+@api_view
+def groups(request):
+    return page_response(
+        request,
+        Group.objects.all(),
+        serializer_for(request, GroupSerializer),
+        ('id',)
+    )
+
+
+@api_view
+@anonymous_page_cache(group_scope)
+def group_posts(request, slug):
+    serializer = serializer_for(request, PostSerializer)
+    group = get_object_or_404(Group, slug=slug)
+    return page_response(request, Post.objects.filter(group=group), serializer)
+
+
+@api_view
+@anonymous_page_cache(profile_scope)
+def profile(request, username):
+    serializer = serializer_for(request, ProfileSerializer)
+    viewer = request.user if 'following' in serializer.names else None
+    author, following = author_summary(username, viewer)
+    if author is None:
+        raise Http404
+    stats = author.stats
+    if not request.user.is_authenticated:
+        following = None
+    return json_response(serializer.dump({
+        'username': author.username,
+        'first_name': author.first_name,
+        'last_name': author.last_name,
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+        'following': following,
+    }))
+
+
+@api_view
+@anonymous_page_cache(profile_scope)
+def profile_posts(request, username):
+    serializer = serializer_for(request, PostSerializer)
+    author = get_object_or_404(User, username=username)
+    return page_response(
+        request, Post.objects.filter(author=author), serializer
+    )
+
+
+@api_view
+def follow(request):
+    if not request.user.is_authenticated:
+        return json_response({'detail': 'Нужна авторизация'}, status=401)
+    serializer = serializer_for(request, PostSerializer)
+    timeline = get_timeline_backend()
+    return page_response(
+        request,
+        timeline.feed(request.user, Post.objects.all()),
+        serializer,
+        timeline.ordering,
+        timeline.keys
+    )
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from yatube.routers import replica_may_lag
+
+from .cache import feed_cache, get_versions, profile_namespace
+from .counters import build_user_stats
+from .follows import is_following
+from .models import Follow, User, UserStats
+
+AUTHOR_ID_KEY = 'author-id:{}'
+SUMMARY_KEY = 'author-summary:{}'
+# Что видно в шапке профиля: в общий кэш не попадает ничего лишнего,
+# вроде хеша пароля или почты
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+STATS_FIELDS = ('posts_count', 'followers_count', 'following_count')
+
+
+def author_summary(username, viewer=None):
+    """
+    Автор со счетчиками в author.stats и признак подписки зрителя.
+
+    Из базы это один запрос: счетчики приходят через JOIN с UserStats,
+    подписка — подзапросом EXISTS, а для автора из кэша — из графа
+    подписок. Автор кэшируется вместе с версией профиля, которую
+    сигналы меняют при записи постов, подписок и самого пользователя,
+    так что шапка профиля из кэша не стоит запросов.
+    Без автора возвращает (None, False).
+    """
+    if viewer is not None and not viewer.is_authenticated:
+        viewer = None
+    cache = feed_cache()
+    author_id = cache.get(AUTHOR_ID_KEY.format(username))
+    version = None
+    if author_id is not None:
+        # Версия читается до запроса в базу: запись, случившаяся
+        # во время сборки, сменит ее, и собранное не будет считаться свежим
+        version = get_versions(profile_namespace(author_id))[0]
+        entry = cache.get(SUMMARY_KEY.format(author_id))
+        if entry is not None and entry[1] == version:
+            author = _author_from(entry[0])
+            if author.username == username:
+                return author, (
+                    viewer is not None and is_following(viewer, author.pk)
+                )
+    author = _load_author(username, viewer)
+    if author is None:
+        return None, False
+    following = author.__dict__.pop('viewer_follows', False)
+    header = _header(author)
+    if author.pk != author_id:
+        cache.set(AUTHOR_ID_KEY.format(username), author.pk, None)
+    elif version is not None and not replica_may_lag():
+        cache.set(
+            SUMMARY_KEY.format(author.pk), (header, version),
+            settings.FEED_CACHE_TIMEOUT
+        )
+    return _author_from(header), following
+
+
+def _header(author):
+    header = {name: getattr(author, name) for name in USER_FIELDS}
+    header.update(
+        (name, getattr(author.stats, name)) for name in STATS_FIELDS
+    )
+    return header
+
+
+def _author_from(header):
+    """Неполный User для шапки: только поля из USER_FIELDS и stats."""
+    author = User(**{name: header[name] for name in USER_FIELDS})
+    author._state.adding = False
+    author.stats = UserStats(
+        user=author, **{name: header[name] for name in STATS_FIELDS}
+    )
+    return author
+
+
+def _load_author(username, viewer):
+    authors = User.objects.filter(username=username).select_related(
+        'stats'
+    ).only(*USER_FIELDS, *(f'stats__{name}' for name in STATS_FIELDS))
+    if viewer is not None:
+        follows = Follow.objects.filter(author=OuterRef('pk'), user=viewer)
+        authors = authors.annotate(viewer_follows=Exists(follows))
+    author = authors.first()
+    if author is None:
+        return None
+    try:
+        author.stats
+    except UserStats.DoesNotExist:
+        author.stats = build_user_stats(author.pk)
+    return author
+
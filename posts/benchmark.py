@@ -0,0 +1,192 @@
+"""Замеры вью через тестовый клиент Django."""
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.template import engines
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube.instrumentation import RequestStats, record_queries
+
+from .cache import feed_cache
+from .feeds import feed_posts
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+PERCENTILES = (50, 90, 99)
+RENDER_SIZES = (10, 50, 100)
+# Лента через {% include %}, через тег карточки и из кэша карточек
+RENDER_TEMPLATES = {
+    'include': (
+        '{% for post in posts %}'
+        '{% include "post_item.html" with post=post %}'
+        '{% endfor %}'
+    ),
+    'post_card': (
+        '{% load post_card %}'
+        '{% for post in posts %}{% post_card post %}{% endfor %}'
+    ),
+    'post_cards': '{% load post_card %}{% post_cards posts %}',
+}
+
+
+def percentile(samples, rank):
+    """Ближайший ранг: без интерполяции, как в большинстве отчетов."""
+    ordered = sorted(samples)
+    index = max(0, -(-rank * len(ordered) // 100) - 1)
+    return ordered[index]
+
+
+def busiest_targets():
+    """
+    Самые тяжелые страницы набора данных: крупнейшая группа, самый
+    активный автор, пост с наибольшим числом комментариев и
+    пользователь с наибольшим числом подписок как зритель.
+    """
+    viewer = Follow.objects.values('user').annotate(
+        follows=Count('id')
+    ).order_by('-follows').values_list('user', flat=True).first()
+    group = Group.objects.annotate(
+        size=Count('posts')
+    ).order_by('-size').values_list('slug', flat=True).first()
+    author = UserStats.objects.order_by('-posts_count').values_list(
+        'user__username', flat=True
+    ).first()
+    post = Post.objects.order_by('-comment_count').values_list(
+        'pk', 'author__username'
+    ).first()
+    viewer = User.objects.filter(pk=viewer).first() or User.objects.first()
+    urls = {'index': reverse('index')}
+    if viewer is not None:
+        urls['follow'] = reverse('follow_index')
+    if group:
+        urls['group'] = reverse('group', args=[group])
+    if author:
+        urls['profile'] = reverse('profile', args=[author])
+    if post:
+        urls['post'] = reverse('post', args=[post[1], post[0]])
+    return viewer, urls
+
+
+def dataset_size():
+    return {
+        'users': User.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def measure(client, url, requests, cold=False):
+    timings = []
+    queries = 0
+    size = 0
+    for _ in range(requests):
+        if cold:
+            feed_cache().clear()
+        # Запросы считаются на всех соединениях, включая пул
+        # posts.concurrent: CaptureQueriesContext видит только свое
+        with record_queries(RequestStats()) as stats:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} ответил {response.status_code}')
+        queries = max(queries, stats.query_count)
+        size = len(response.content)
+    result = {
+        'url': url,
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'queries': queries,
+        'bytes': size,
+    }
+    for rank in PERCENTILES:
+        result[f'p{rank}_ms'] = round(percentile(timings, rank), 2)
+    return result
+
+
+def run_benchmark(views=None, requests=20, cold=False, report=None):
+    """
+    Прогоняет страницы от имени зрителя и возвращает отчет,
+    пригодный для json.dump и сравнения с прошлыми замерами.
+    """
+    report = report or (lambda message: None)
+    viewer, urls = busiest_targets()
+    client = Client()
+    if viewer is not None:
+        client.force_login(viewer)
+    results = {}
+    for name, url in urls.items():
+        if views and name not in views:
+            continue
+        # Первый запрос прогревает счетчики и кэш, в замер не идет
+        if not cold:
+            client.get(url)
+        results[name] = measure(client, url, requests, cold)
+        report(
+            f'{name}: p50 {results[name]["p50_ms"]} мс, '
+            f'p99 {results[name]["p99_ms"]} мс, '
+            f'запросов {results[name]["queries"]}'
+        )
+    return {
+        'created': timezone.now().isoformat(),
+        'requests': requests,
+        'cold': cold,
+        'dataset': dataset_size(),
+        'views': results,
+    }
+
+
+def compare(previous, current):
+    """Строки отчета об изменениях p50, p99 и числа запросов."""
+    lines = []
+    for name, result in current['views'].items():
+        old = previous.get('views', {}).get(name)
+        if old is None:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p99_ms', 'queries'):
+            if old[key]:
+                delta = (result[key] - old[key]) / old[key] * 100
+                changes.append(
+                    f'{key} {old[key]} -> {result[key]} ({delta:+.0f}%)'
+                )
+        lines.append(f'{name}: ' + ', '.join(changes))
+    return lines
+
+
+def render_benchmark(sizes=RENDER_SIZES, repeats=20, report=None):
+    """
+    Время рендера ленты из N карточек без запросов к базе: посты
+    читаются заранее и повторяются, если их меньше N.
+    """
+    report = report or (lambda message: None)
+    posts = list(feed_posts().order_by('-pub_date')[:max(sizes)])
+    if not posts:
+        raise RuntimeError('Нет постов: сначала generate_load_data')
+    engine = engines['django']
+    templates = {
+        name: engine.from_string(code)
+        for name, code in RENDER_TEMPLATES.items()
+    }
+    results = {}
+    for size in sizes:
+        context = {
+            'posts': (posts * (size // len(posts) + 1))[:size],
+            'user': AnonymousUser(),
+        }
+        results[size] = {}
+        for name, template in templates.items():
+            # Первый рендер загружает шаблоны и миниатюры
+            template.render(context)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                template.render(context)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[size][f'{name}_p50_ms'] = round(percentile(timings, 50), 2)
+        report(f'{size} постов: ' + ', '.join(
+            f'{key} {value}' for key, value in results[size].items()
+        ))
+    return results
@@ -0,0 +1,150 @@
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from yatube.routers import note_written, replica_may_lag
+
+from .thumbnails import track_fallbacks
+
+VERSION_KEY = 'feed-version:{}'
+LOCK_KEY = 'rebuild-lock:{}'
+# Сколько секунд после истечения отдавать старое значение, пока
+# один воркер пересобирает новое
+STALE_GRACE = 60
+LOCK_TIMEOUT = 30
+# Сколько ждать чужую сборку холодного ключа, прежде чем собрать самому
+WAIT_TIMEOUT = 2
+WAIT_STEP = 0.05
+# Коэффициент раннего обновления (XFetch): больше — раньше
+EARLY_EXPIRY_BETA = 1.0
+
+
+def feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def index_namespace():
+    return 'index'
+
+
+def group_namespace(group_id):
+    return f'group:{group_id}'
+
+
+def profile_namespace(author_id):
+    return f'profile:{author_id}'
+
+
+def follow_namespace(user_id):
+    return f'follow:{user_id}'
+
+
+def graph_namespace(user_id):
+    return f'graph:{user_id}'
+
+
+def _new_version():
+    # Время записи в начале версии: по ней видно, когда менялась лента
+    return f'{int(time.time() * 1000):x}-{uuid.uuid4().hex[:8]}'
+
+
+def get_versions(*namespaces):
+    """Версии пространств ключей за одно обращение к кэшу."""
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    cache = feed_cache()
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    versions = [versions[key] for key in keys]
+    # Реплика могла еще не получить эти записи, см. yatube.routers
+    note_written(written_at('.'.join(versions)))
+    return versions
+
+
+def feed_version(*namespaces):
+    """
+    Метка для {% cache %}: меняется при любой записи в этих лентах,
+    поэтому фрагменты можно держать часами и не показывать старое.
+    """
+    return '.'.join(get_versions(*namespaces))
+
+
+def written_at(version):
+    """Время последней записи (timestamp) в ленты версии feed_version."""
+    stamps = []
+    for token in version.split('.'):
+        stamp, separator, _ = token.partition('-')
+        if separator:
+            stamps.append(int(stamp, 16) / 1000)
+    return max(stamps, default=None)
+
+
+def bump_versions(*namespaces):
+    if namespaces:
+        feed_cache().set_many(
+            {VERSION_KEY.format(namespace): _new_version()
+             for namespace in namespaces},
+            None
+        )
+
+
+def get_or_build(key, build, timeout, beta=EARLY_EXPIRY_BETA):
+    """
+    Кэш с защитой от давки при истечении ключа.
+
+    Значение хранится вместе со временем сборки и логическим сроком.
+    Незадолго до срока ключ вероятностно пересобирается заранее
+    (XFetch), после срока его пересобирает только воркер, взявший
+    блокировку через add, а остальные отдают старое значение. Если
+    значения нет совсем, остальные недолго ждут результат того же воркера.
+    """
+    cache = feed_cache()
+    lock_key = LOCK_KEY.format(key)
+    entry = cache.get(key)
+    if entry is not None:
+        value, build_time, expires = entry
+        jitter = -build_time * beta * math.log(1.0 - random.random())
+        if time.time() + jitter < expires:
+            return value
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            return value
+    else:
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            entry = _wait_for(cache, key)
+            if entry is not None:
+                return entry[0]
+    try:
+        started = time.time()
+        with track_fallbacks() as fallbacks:
+            value = build()
+        finished = time.time()
+        # С оригиналом вместо миниатюры или с отстающей реплики
+        # фрагмент соберут следующим запросом
+        if not fallbacks and not replica_may_lag():
+            cache.set(
+                key,
+                (value, finished - started, finished + timeout),
+                timeout + STALE_GRACE
+            )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def _wait_for(cache, key):
+    deadline = time.time() + WAIT_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
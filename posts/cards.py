@@ -0,0 +1,61 @@
+"""Кэш отрендеренных карточек постов, общий для всех лент."""
+import hashlib
+
+from django.conf import settings
+
+from .cache import feed_cache
+from .thumbnails import track_fallbacks
+
+CARD_KEY = 'post-card:{}:{}'
+CARD_TEMPLATE = 'post_item.html'
+# Меняется вместе с разметкой post_item.html
+CARD_GENERATION = 1
+
+
+def card_key(post, user):
+    """
+    Ключ карточки: id поста и версия из всего, что видно в карточке.
+
+    Правка поста, новый комментарий, переименование автора или группы
+    дают новый ключ без отдельного счетчика версий, поэтому ключи всей
+    страницы известны сразу и читаются одним get_many.
+    """
+    group = post.group
+    parts = (
+        CARD_GENERATION,
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name if post.image else '',
+        post.comment_count,
+        post.author.username,
+        (group.slug, group.title) if group else None,
+        # Кнопку «Редактировать» видит только автор
+        user is not None and user.pk == post.author_id,
+    )
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return CARD_KEY.format(post.pk, digest)
+
+
+def render_cards(posts, user, render):
+    """
+    HTML карточек постов по порядку.
+
+    Готовые карточки берутся из кэша одним get_many, рендерятся только
+    промахи. Карточка, где вместо миниатюры показан оригинал, в кэш
+    не кладется: миниатюра скоро будет готова.
+    """
+    posts = list(posts)
+    keys = [card_key(post, user) for post in posts]
+    cache = feed_cache()
+    cards = cache.get_many(keys)
+    rendered = {}
+    for post, key in zip(posts, keys):
+        if key in cards:
+            continue
+        with track_fallbacks() as fallbacks:
+            cards[key] = render(post)
+        if not fallbacks:
+            rendered[key] = cards[key]
+    if rendered:
+        cache.set_many(rendered, settings.FEED_CACHE_TIMEOUT)
+    return [cards[key] for key in keys]
@@ -0,0 +1,93 @@
+"""Параллельная выборка независимых данных страницы."""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connection, connections
+
+from yatube.routers import (note_lag, reading_from_replica, replica_may_lag,
+                            replica_reads)
+
+
+class Fetcher:
+    """
+    Пул потоков для запросов, которые не зависят друг от друга.
+
+    У каждого потока свое соединение с базой, поэтому запросы идут
+    одновременно, а время страницы определяет самый медленный из них.
+    При VIEW_FETCH_WORKERS = 0 и внутри транзакции (ее данные другие
+    соединения не видят) задачи выполняются по очереди в вызывающем потоке.
+
+    Соединения потоков пула открываются один раз на поток, а не на
+    задачу, и закрываются только после ошибок.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def fetch(self, **tasks):
+        """Выполняет задачи и возвращает словарь результатов по именам."""
+        if (not settings.VIEW_FETCH_WORKERS or len(tasks) < 2
+                or connection.in_atomic_block):
+            return {name: task() for name, task in tasks.items()}
+        # Обертки execute_wrapper (замеры, бенчмарк) действуют и в пуле
+        wrappers = {
+            db.alias: list(db.execute_wrappers) for db in connections.all()
+        }
+        routing = reading_from_replica(), replica_may_lag()
+        # Первая задача выполняется здесь же: поток запроса все равно ждет
+        (first, first_task), *rest = tasks.items()
+        futures = {
+            name: self.executor.submit(self._run, task, wrappers, routing)
+            for name, task in rest
+        }
+        try:
+            results = {first: first_task()}
+        finally:
+            wait(futures.values())
+        for name, future in futures.items():
+            results[name], lagging = future.result()
+            # Отставание реплики, замеченное в пуле, касается всего запроса
+            if lagging:
+                note_lag()
+        return results
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.VIEW_FETCH_WORKERS,
+                    thread_name_prefix='fetch'
+                )
+            return self._executor
+
+    @staticmethod
+    def _run(task, wrappers, routing):
+        try:
+            with ExitStack() as stack:
+                # Поток читает из той же базы, что и запрос
+                stack.enter_context(replica_reads(*routing))
+                for db in connections.all():
+                    for wrapper in wrappers.get(db.alias, ()):
+                        stack.enter_context(db.execute_wrapper(wrapper))
+                return task(), replica_may_lag()
+        finally:
+            _close_broken_connections()
+
+
+def _close_broken_connections():
+    # Как close_if_unusable_or_obsolete, но без CONN_MAX_AGE: при 0
+    # поток открывал бы новое соединение на каждую задачу
+    for db in connections.all():
+        if db.connection is not None and db.errors_occurred:
+            if db.is_usable():
+                db.errors_occurred = False
+            else:
+                db.close()
+
+
+fetcher = Fetcher()
+fetch = fetcher.fetch
@@ -0,0 +1,81 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count_subquery(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def users_with_real_counts():
+    """Пользователи с пересчитанными по таблицам счетчиками."""
+    return User.objects.annotate(
+        real_posts=_count_subquery(Post.objects.all(), 'author'),
+        real_followers=_count_subquery(Follow.objects.all(), 'author'),
+        real_following=_count_subquery(Follow.objects.all(), 'user'),
+    )
+
+
+def posts_with_real_counts():
+    return Post.objects.annotate(
+        real_comments=_count_subquery(Comment.objects.all(), 'post'),
+    )
+
+
+def build_user_stats(user_id):
+    user = users_with_real_counts().get(pk=user_id)
+    stats = UserStats(
+        user_id=user_id,
+        posts_count=user.real_posts,
+        followers_count=user.real_followers,
+        following_count=user.real_following,
+    )
+    # Параллельный запрос мог успеть создать строку раньше
+    UserStats.objects.bulk_create([stats], ignore_conflicts=True)
+    return stats
+
+
+def get_user_stats(user):
+    """
+    Счетчики профиля одним запросом по первичному ключу.
+
+    Строка создается лениво при первом обращении, дальше ее
+    поддерживают сигналы, а manage.py rebuild_counters сверяет с таблицами.
+    """
+    try:
+        return UserStats.objects.get(user_id=user.pk)
+    except UserStats.DoesNotExist:
+        return build_user_stats(user.pk)
+
+
+def recount_follow_stats(user_id, author_ids):
+    """
+    Пересчитывает счетчики подписок по индексам Follow, а не сдвигает:
+    параллельная подписка на тех же авторов не посчитается дважды.
+    """
+    # Строк UserStats может еще не быть: их соберут лениво по таблицам
+    UserStats.objects.filter(user_id=user_id).update(
+        following_count=_count_subquery(Follow.objects.all(), 'user')
+    )
+    UserStats.objects.filter(user_id__in=author_ids).update(
+        followers_count=_count_subquery(Follow.objects.all(), 'author')
+    )
+
+
+def change_user_stats(user_id, field, delta):
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    stats.update(**{field: F(field) + delta})
+
+
+def change_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
@@ -0,0 +1,17 @@
+from .models import Comment, Post
+
+
+def feed_posts(**filters):
+    """
+    Общий queryset для лент и карточки поста.
+
+    Автор и группа приходят одним запросом, число комментариев хранится
+    в Post.comment_count, поэтому post_item.html не делает запросов
+    на каждый пост.
+    """
+    return Post.objects.filter(**filters).select_related('author', 'group')
+
+
+def post_comments(post_id):
+    """Комментарии поста вместе с авторами, без запроса на каждого."""
+    return Comment.objects.filter(post_id=post_id).select_related('author')
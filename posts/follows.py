@@ -0,0 +1,145 @@
+"""Граф подписок: кэшированные множества id и пакетные подписки."""
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from yatube.routers import replica_may_lag
+
+from .cache import (bump_versions, feed_cache, feed_version, follow_namespace,
+                    get_versions, graph_namespace, profile_namespace)
+from .counters import recount_follow_stats
+from .models import Follow, User
+from .timeline import get_timeline_backend
+
+FOLLOWING_KEY = 'following-ids:{}:{}'
+FOLLOWERS_KEY = 'follower-ids:{}:{}'
+
+
+def _cached_ids(key, user_id, queryset):
+    # Версия читается до запроса: подписка, записанная во время
+    # сборки, сменит ее, и устаревшее множество никто не прочитает
+    version = get_versions(graph_namespace(user_id))[0]
+    key = key.format(user_id, version)
+    cache = feed_cache()
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(queryset)
+        if not replica_may_lag():
+            cache.set(key, ids, settings.FEED_CACHE_TIMEOUT)
+    return ids
+
+
+def following_ids(user_id):
+    """id авторов, на которых подписан пользователь."""
+    return _cached_ids(FOLLOWING_KEY, user_id, Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True))
+
+
+def follower_ids(author_id):
+    """id подписчиков автора."""
+    return _cached_ids(FOLLOWERS_KEY, author_id, Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True))
+
+
+def follow_feed_version(user_id):
+    """
+    Версия ленты подписок: подписки пользователя и самая новая запись
+    его ленты.
+
+    Новый пост попадает к подписчикам строкой ленты, а не сменой их
+    версий, поэтому запись не обходит подписчиков, а версия стоит один
+    ключ кэша и одну строку индекса, сколько бы авторов ни читал
+    пользователь. Правки и комментарии старых записей лента покажет,
+    когда истечет FOLLOW_FEED_CACHE_TIMEOUT.
+    """
+    # Версия подписок читается до запроса, как в get_or_build
+    version = feed_version(follow_namespace(user_id))
+    return f'{version}:{get_timeline_backend().newest(user_id)}'
+
+
+def followed_among(user, author_ids):
+    """
+    Кого из авторов читает пользователь: одно обращение к кэшу
+    на всю ленту, сколько бы авторов в ней ни было.
+    """
+    if not user.is_authenticated:
+        return set()
+    return following_ids(user.pk).intersection(author_ids)
+
+
+def is_following(user, author_id):
+    return bool(followed_among(user, [author_id]))
+
+
+def follow(user_id, author_ids):
+    """
+    Подписывает пользователя на авторов одной вставкой.
+
+    bulk_create не вызывает сигналы, поэтому счетчики, ленты и версии
+    кэша обновляются здесь же пачкой; счетчики пересчитываются, так что
+    параллельная подписка на тех же авторов их не собьет. Возвращает
+    id новых авторов.
+    """
+    candidates = set(User.objects.filter(pk__in=author_ids).exclude(
+        pk=user_id
+    ).values_list('pk', flat=True))
+    if not candidates:
+        return candidates
+    with transaction.atomic():
+        authors = candidates - set(Follow.objects.filter(
+            user_id=user_id, author_id__in=candidates
+        ).values_list('author_id', flat=True))
+        if not authors:
+            return authors
+        Follow.objects.bulk_create(
+            [Follow(user_id=user_id, author_id=pk) for pk in authors],
+            ignore_conflicts=True
+        )
+        recount_follow_stats(user_id, authors)
+        get_timeline_backend().backfill(user_id, *authors)
+        transaction.on_commit(lambda: _invalidate(user_id, authors))
+    return authors
+
+
+def unfollow(user_id, author_ids):
+    """Отписывает от авторов одним удалением; возвращает id авторов."""
+    with transaction.atomic():
+        authors = set(Follow.objects.filter(
+            user_id=user_id, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+        if not authors:
+            return authors
+        _delete_follows(user_id, authors)
+        recount_follow_stats(user_id, authors)
+        get_timeline_backend().prune(user_id, *authors)
+        transaction.on_commit(lambda: _invalidate(user_id, authors))
+    return authors
+
+
+def _delete_follows(user_id, author_ids):
+    # QuerySet.delete() отправил бы post_delete на каждую строку: все,
+    # что делают сигналы, unfollow выполняет пачкой
+    db = connections[router.db_for_write(Follow)]
+    meta = Follow._meta
+    sql = 'DELETE FROM {} WHERE {} = %s AND {} IN ({})'.format(
+        db.ops.quote_name(meta.db_table),
+        db.ops.quote_name(meta.get_field('user').column),
+        db.ops.quote_name(meta.get_field('author').column),
+        ', '.join(['%s'] * len(author_ids)),
+    )
+    with db.cursor() as cursor:
+        cursor.execute(sql, [user_id, *author_ids])
+
+
+def _invalidate(user_id, author_ids):
+    namespaces = [
+        follow_namespace(user_id),
+        profile_namespace(user_id),
+        graph_namespace(user_id),
+    ]
+    for author_id in author_ids:
+        namespaces += [
+            profile_namespace(author_id), graph_namespace(author_id)
+        ]
+    bump_versions(*namespaces)
@@ -1,6 +1,9 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
 from .models import Comment, Post
+from .uploads import OversizedUpload, shrink_image
 
 
 class PostForm(forms.ModelForm):
@@ -25,6 +28,41 @@ class PostForm(forms.ModelForm):
             'group': 'form-control',
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Слишком большие файлы BoundedUploadHandler не сохранил:
+        # убираем заглушки, чтобы показать понятную ошибку
+        self.oversized = [
+            name for name, upload in self.files.items()
+            if isinstance(upload, OversizedUpload)
+        ]
+        if self.oversized:
+            self.files = self.files.copy()
+            for name in self.oversized:
+                del self.files[name]
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not hasattr(image, 'image'):
+            # Картинку не загружали или оставили прежнюю
+            return image
+        width, height = image.image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                f'Слишком большое разрешение: {width}x{height}'
+            )
+        return shrink_image(image)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for name in self.oversized:
+            self.add_error(name, forms.ValidationError(
+                'Файл больше {}'.format(
+                    filesizeformat(settings.UPLOAD_MAX_SIZE)
+                )
+            ))
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     text = forms.CharField(
@@ -0,0 +1,201 @@
+"""Синтетические данные для нагрузочных замеров."""
+import datetime as dt
+import os
+import random
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from PIL import Image
+
+from .models import Comment, Follow, Group, Post, User
+from .transfer import original_dates
+
+BATCH_SIZE = 5000
+DISTRIBUTIONS = ('fixed', 'uniform', 'pareto')
+# Хвост Парето: немногие авторы пишут большую часть постов
+PARETO_ALPHA = 1.5
+IMAGE_COUNT = 8
+USERNAME = 'loaduser{}'
+
+
+class Generator:
+    """
+    Пишет пользователей, группы, посты, комментарии и подписки
+    пачками через bulk_create, не держа весь набор в памяти.
+
+    Количество постов у автора, подписок у пользователя и комментариев
+    к посту выбирается по распределению со средним из параметров.
+    """
+
+    def __init__(self, users, groups, posts_per_author, follows_per_user,
+                 comments_per_post, image_share, distribution='pareto',
+                 days=365, seed=None, report=None):
+        self.users = users
+        self.groups = groups
+        self.posts_per_author = posts_per_author
+        self.follows_per_user = follows_per_user
+        self.comments_per_post = comments_per_post
+        self.image_share = image_share
+        self.distribution = distribution
+        self.days = days
+        self.random = random.Random(seed)
+        self.report = report or (lambda message: None)
+        self.now = timezone.now()
+
+    def draw(self, mean):
+        if mean <= 0:
+            return 0
+        if self.distribution == 'fixed':
+            return int(mean)
+        if self.distribution == 'uniform':
+            return self.random.randint(0, int(2 * mean))
+        # Среднее Парето с xm = 1 равно alpha / (alpha - 1)
+        scale = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+        return int(scale * self.random.paretovariate(PARETO_ALPHA))
+
+    def run(self):
+        user_ids = self.create_users()
+        group_ids = self.create_groups()
+        images = self.create_images() if self.image_share else []
+        # Комментарии получают только новые посты
+        last_post = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        self.create_posts(user_ids, group_ids, images)
+        self.create_comments(user_ids, last_post)
+        self.create_follows(user_ids)
+
+    def create_users(self):
+        # Один хеш на всех: make_password на каждого занял бы часы
+        password = make_password('loadtest')
+        start = User.objects.count()
+        self._bulk(User, (
+            User(username=USERNAME.format(start + i), password=password)
+            for i in range(self.users)
+        ))
+        return list(User.objects.values_list('id', flat=True))
+
+    def create_groups(self):
+        start = Group.objects.count()
+        self._bulk(Group, (
+            Group(
+                title=f'Группа {start + i}',
+                slug=f'load-group-{start + i}',
+                description='Сгенерированная группа',
+            )
+            for i in range(self.groups)
+        ))
+        return list(Group.objects.values_list('id', flat=True))
+
+    def create_images(self):
+        names = []
+        directory = os.path.join(settings.MEDIA_ROOT, 'posts', 'load')
+        os.makedirs(directory, exist_ok=True)
+        for i in range(IMAGE_COUNT):
+            name = f'posts/load/image{i}.jpg'
+            path = os.path.join(settings.MEDIA_ROOT, name)
+            if not os.path.exists(path):
+                color = tuple(self.random.randrange(256) for _ in range(3))
+                output = BytesIO()
+                Image.new('RGB', (1280, 720), color).save(output, 'JPEG')
+                with open(path, 'wb') as image:
+                    image.write(output.getvalue())
+            names.append(name)
+        return names
+
+    def create_posts(self, user_ids, group_ids, images):
+        def posts():
+            for author_id in user_ids:
+                for _ in range(self.draw(self.posts_per_author)):
+                    yield Post(
+                        text=self.text(),
+                        author_id=author_id,
+                        group_id=self.maybe(group_ids, 0.5),
+                        image=self.maybe(images, self.image_share) or '',
+                        pub_date=self.moment(),
+                    )
+        self._bulk(Post, posts())
+
+    def create_comments(self, user_ids, after=0):
+        def comments():
+            for post_id in self.post_ids(after):
+                for _ in range(self.draw(self.comments_per_post)):
+                    yield Comment(
+                        post_id=post_id,
+                        author_id=self.random.choice(user_ids),
+                        text=self.text(words=8),
+                        created=self.moment(),
+                    )
+        self._bulk(Comment, comments())
+
+    @staticmethod
+    def post_ids(last):
+        # Пачками по pk, без открытого курсора: в SQLite запись
+        # в то же соединение во время чтения небезопасна
+        while True:
+            ids = list(Post.objects.filter(pk__gt=last).order_by(
+                'pk'
+            ).values_list('pk', flat=True)[:BATCH_SIZE])
+            if not ids:
+                return
+            yield from ids
+            last = ids[-1]
+
+    def create_follows(self, user_ids):
+        def follows():
+            for user_id in user_ids:
+                count = min(
+                    self.draw(self.follows_per_user), len(user_ids) - 1
+                )
+                authors = set()
+                while len(authors) < count:
+                    author_id = self.random.choice(user_ids)
+                    if author_id != user_id:
+                        authors.add(author_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+        self._bulk(Follow, follows())
+
+    def maybe(self, choices, share):
+        if choices and self.random.random() < share:
+            return self.random.choice(choices)
+        return None
+
+    def text(self, words=40):
+        return ' '.join(
+            self.random.choice(VOCABULARY)
+            for _ in range(self.random.randint(1, words))
+        )
+
+    def moment(self):
+        return self.now - dt.timedelta(
+            seconds=self.random.randrange(self.days * 24 * 60 * 60)
+        )
+
+    def _bulk(self, model, objects):
+        count = 0
+        batch = []
+        with original_dates(model):
+            for obj in objects:
+                batch.append(obj)
+                if len(batch) == BATCH_SIZE:
+                    model.objects.bulk_create(batch, ignore_conflicts=True)
+                    count += len(batch)
+                    batch = []
+                    self.report(f'{model.__name__}: {count}')
+            if batch:
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                count += len(batch)
+        self.report(f'{model.__name__}: {count}')
+
+
+VOCABULARY = (
+    'кролики', 'это', 'не', 'только', 'ценный', 'мех', 'но', 'и', 'три',
+    'четыре', 'килограмма', 'диетического', 'легкоусвояемого', 'мяса',
+    'сегодня', 'вчера', 'город', 'река', 'лес', 'дорога', 'поезд', 'утро',
+    'вечер', 'книга', 'музыка', 'кофе', 'чай', 'работа', 'отпуск', 'море',
+    'горы', 'снег', 'дождь', 'солнце', 'друзья', 'семья', 'кот', 'собака',
+    'фото', 'новости', 'python', 'django', 'база', 'данных', 'запрос',
+)
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import RENDER_SIZES, render_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Замеряет рендер ленты из 10, 50 и 100 карточек постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(map(str, RENDER_SIZES)),
+            help='Размеры страниц через запятую',
+        )
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument(
+            '--output', help='Куда сохранить отчет в JSON',
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        try:
+            results = render_benchmark(
+                sizes, options['repeats'], self.stdout.write
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержку и число запросов главных страниц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--views',
+            help='Через запятую: index, group, profile, follow, post',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Сбрасывать кэш лент перед каждым запросом',
+        )
+        parser.add_argument(
+            '--output', help='Куда сохранить отчет в JSON',
+        )
+        parser.add_argument(
+            '--compare', help='Прошлый отчет для сравнения',
+        )
+
+    def handle(self, *args, **options):
+        views = options['views'].split(',') if options['views'] else None
+        report = run_benchmark(
+            views, options['requests'], options['cold'], self.stdout.write
+        )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        if options['compare']:
+            with open(options['compare']) as previous:
+                for line in compare(json.load(previous), report):
+                    self.stdout.write(line)
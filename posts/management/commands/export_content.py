@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import export_content
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки в JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Папка для файлов выгрузки')
+        parser.add_argument(
+            '--media',
+            action='store_true',
+            help='Скопировать картинки постов',
+        )
+
+    def handle(self, *args, **options):
+        export_content(
+            options['directory'], self.stdout.write, options['media']
+        )
+        self.stdout.write(self.style.SUCCESS('Выгрузка завершена'))
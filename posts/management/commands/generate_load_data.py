@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from posts.generator import DISTRIBUTIONS, Generator
+from posts.transfer import rebuild_derived_data
+
+
+class Command(BaseCommand):
+    help = 'Генерирует пользователей, посты, комментарии и подписки для замеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument(
+            '--posts-per-author', type=float, default=10,
+            help='Среднее число постов у автора',
+        )
+        parser.add_argument(
+            '--follows-per-user', type=float, default=20,
+            help='Среднее число подписок у пользователя',
+        )
+        parser.add_argument(
+            '--comments-per-post', type=float, default=3,
+            help='Среднее число комментариев к посту',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0,
+            help='Доля постов с картинкой, от 0 до 1',
+        )
+        parser.add_argument(
+            '--distribution', choices=DISTRIBUTIONS, default='pareto',
+            help='Как разбросаны количества вокруг среднего',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней разбросать даты публикаций',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        Generator(
+            users=options['users'],
+            groups=options['groups'],
+            posts_per_author=options['posts_per_author'],
+            follows_per_user=options['follows_per_user'],
+            comments_per_post=options['comments_per_post'],
+            image_share=options['images'],
+            distribution=options['distribution'],
+            days=options['days'],
+            seed=options['seed'],
+            report=self.stdout.write,
+        ).run()
+        rebuild_derived_data(self.stdout)
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_variants
+
+
+class Command(BaseCommand):
+    help = 'Собирает миниатюры всех картинок постов, например после деплоя'
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('image', flat=True)
+        count = 0
+        for name in images.iterator():
+            generate_variants(name)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Миниатюры собраны: {count}'))
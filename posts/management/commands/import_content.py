@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (TransferError, import_content,
+                            rebuild_derived_data)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_content: пользователей по username, '
+        'остальное — в пустые таблицы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Папка с файлами выгрузки')
+        parser.add_argument(
+            '--media',
+            action='store_true',
+            help='Скопировать картинки постов в MEDIA_ROOT',
+        )
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не пересобирать ленты, счетчики и поиск после загрузки',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import_content(
+                options['directory'], self.stdout.write, options['media']
+            )
+        except TransferError as error:
+            raise CommandError(error)
+        if not options['skip_rebuild']:
+            rebuild_derived_data(self.stdout)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts.cache import bump_versions, profile_namespace
+from posts.counters import posts_with_real_counts, users_with_real_counts
+from posts.models import Post, UserStats
+from posts.signals import feed_namespaces
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики профилей и комментариев и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        users_fixed = self.reconcile_users(dry_run)
+        posts_fixed = self.reconcile_posts(dry_run)
+        verb = 'Найдено' if dry_run else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} расхождений: профили {users_fixed}, посты {posts_fixed}'
+        ))
+
+    def reconcile_users(self, dry_run):
+        # SQLite не изолирует чтение от записи в одном соединении,
+        # поэтому исправления применяются после обхода.
+        users = users_with_real_counts().select_related('stats')
+        drifted = []
+        missing = []
+        for user in users.iterator(chunk_size=CHUNK_SIZE):
+            real = {
+                'posts_count': user.real_posts,
+                'followers_count': user.real_followers,
+                'following_count': user.real_following,
+            }
+            try:
+                stats = user.stats
+            except UserStats.DoesNotExist:
+                missing.append(UserStats(user_id=user.pk, **real))
+                continue
+            if any(getattr(stats, key) != value for key, value in real.items()):
+                drifted.append((user.pk, real))
+        if not dry_run:
+            for user_id, real in drifted:
+                UserStats.objects.filter(user_id=user_id).update(**real)
+            UserStats.objects.bulk_create(
+                missing, batch_size=CHUNK_SIZE, ignore_conflicts=True
+            )
+            # Шапки профилей с исправленными счетчиками лежат в кэше
+            bump_versions(*(
+                profile_namespace(user_id) for user_id, real in drifted
+            ))
+        return len(drifted)
+
+    def reconcile_posts(self, dry_run):
+        drifted = list(posts_with_real_counts().filter(
+            ~Q(comment_count=F('real_comments'))
+        ).values_list('pk', 'author_id', 'group_id', 'real_comments'))
+        if not dry_run:
+            namespaces = set()
+            for post_id, author_id, group_id, real_comments in drifted:
+                Post.objects.filter(pk=post_id).update(
+                    comment_count=real_comments
+                )
+                namespaces.update(feed_namespaces(author_id, group_id))
+            # update() не вызывает сигналы, а ленты с этими постами
+            # лежат в кэше
+            bump_versions(*namespaces)
+        return len(drifted)
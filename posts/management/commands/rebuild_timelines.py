@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import get_timeline_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из таблиц Follow и Post'
+
+    def handle(self, *args, **options):
+        get_timeline_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS('Ленты подписок пересобраны'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from yatube.instrumentation import aggregate, collect_snapshots, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка замеров по вью из YATUBE_INSTRUMENT. Чтобы увидеть '
+        'все воркеры, нужен общий кэш, например YATUBE_CACHE_PATH'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', default='p99_ms',
+            choices=('requests', 'p50_ms', 'p99_ms', 'queries', 'sql_ms'),
+        )
+
+    def handle(self, *args, **options):
+        snapshots = collect_snapshots() or [aggregate.snapshot()]
+        summary = summarize(snapshots)
+        if not summary:
+            self.stdout.write('Замеров пока нет')
+            return
+        for view, row in sorted(
+            summary.items(), key=lambda item: -item[1][options['sort']]
+        ):
+            self.stdout.write(
+                f'{view}: {row["requests"]} запросов, '
+                f'p50 {row["p50_ms"]:.1f} мс, p99 {row["p99_ms"]:.1f} мс, '
+                f'SQL {row["queries"]:.1f} ({row["max_queries"]} макс.) '
+                f'за {row["sql_ms"]:.1f} мс, '
+                f'шаблоны {row["template_ms"]:.1f} мс'
+            )
+            for sql, count in row['duplicates'].items():
+                self.stdout.write(f'    повторы x{count}: {sql}')
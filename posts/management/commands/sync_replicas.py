@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик: '
+        'локальная замена репликации'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте YATUBE_REPLICAS')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копировать можно только базу SQLite')
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                # Онлайн-копия: запись в основную базу не останавливается
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: скопировано')
+        self.stdout.write(self.style.SUCCESS(
+            f'Реплик обновлено: {len(settings.DATABASE_REPLICAS)}'
+        ))
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+
+def create_search_tables(apps, schema_editor):
+    # FTS5 есть только в SQLite: на других базах поиск не создается
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE posts_post_search USING fts5(text, {TOKENIZE})'
+    )
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE posts_comment_search '
+        f'USING fts5(text, post_id UNINDEXED, {TOKENIZE})'
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_post_search (rowid, text) '
+        "SELECT id, COALESCE(text, '') FROM posts_post"
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_comment_search (rowid, text, post_id) '
+        'SELECT id, text, post_id FROM posts_comment'
+    )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS posts_post_search')
+    schema_editor.execute('DROP TABLE IF EXISTS posts_comment_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
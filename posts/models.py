@@ -61,9 +61,30 @@ class Post(models.Model):
         verbose_name='Изображение',
         help_text='Загрузите изображение'
     )
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+        help_text='Счетчик комментариев, обновляется сигналами'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        # Индексы повторяют сортировку лент: общая, автора, группы
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         # str_return = (
@@ -110,6 +131,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return str(self.text)[:15]
@@ -131,3 +158,90 @@ class Follow(models.Model):
         verbose_name='Автор',
         help_text='Автор'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счетчики профиля."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+        help_text='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Записей',
+        default=0,
+        help_text='Количество записей'
+    )
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        help_text='Количество подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        'Подписок',
+        default=0,
+        help_text='Количество подписок'
+    )
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: строка на пару подписчик-пост."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+        help_text='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Запись',
+        help_text='Запись'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+        help_text='Автор записи'
+    )
+    pub_date = models.DateTimeField(
+        'Дата публикации',
+        help_text='Дата публикации записи'
+    )
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'
+            ),
+        ]
@@ -0,0 +1,118 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+
+from yatube.routers import replica_may_lag
+
+from .cache import (feed_cache, feed_version, group_namespace,
+                    index_namespace, profile_namespace, written_at)
+from .models import Group, User
+from .thumbnails import track_fallbacks
+
+PAGE_KEY = 'anonymous-page:{}'
+
+
+def index_scope(request):
+    return [index_namespace()]
+
+
+def group_scope(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return [group_namespace(group_id)]
+
+
+def _author_id(username):
+    return User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+
+
+def profile_scope(request, username):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return [profile_namespace(author_id)]
+
+
+def post_scope(request, username, post_id):
+    return profile_scope(request, username)
+
+
+def anonymous_page_cache(scope):
+    """
+    Кэш целых страниц для анонимов с условными GET.
+
+    scope возвращает пространства ключей страницы (см. posts.cache).
+    ETag считается из их версий, Last-Modified — время последней записи
+    из тех же версий, поэтому 304 и ответ из кэша отдаются без вызова
+    вью, рендера и запросов к таблицам. Авторизованные пользователи
+    и все не-GET запросы идут мимо кэша.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            namespaces = scope(request, *args, **kwargs)
+            if namespaces is None:
+                return view(request, *args, **kwargs)
+            version = feed_version(*namespaces)
+            digest = hashlib.sha1(
+                f'{request.get_full_path()}|{version}'.encode()
+            ).hexdigest()
+            etag = quote_etag(digest)
+            cache = feed_cache()
+            entry = cache.get(PAGE_KEY.format(digest))
+            last_modified = written_at(version)
+            if last_modified is not None:
+                last_modified = int(last_modified)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                _set_validators(not_modified, etag, last_modified)
+                return not_modified
+            if entry is not None:
+                response = HttpResponse(
+                    entry['content'], content_type=entry['content_type']
+                )
+                _set_validators(response, etag, last_modified)
+                return response
+            with track_fallbacks() as fallbacks:
+                response = view(request, *args, **kwargs)
+            # Страница с csrf-токеном привязана к cookie конкретного
+            # клиента, а с оригиналом вместо миниатюры или с отстающей
+            # реплики — ненадолго
+            if (response.status_code != 200 or response.streaming
+                    or request.META.get('CSRF_COOKIE_USED') or fallbacks
+                    or replica_may_lag()):
+                return response
+            cache.set(
+                PAGE_KEY.format(digest),
+                {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                },
+                settings.FEED_CACHE_TIMEOUT
+            )
+            _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Cookie',))
@@ -0,0 +1,292 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+from yatube.routers import replica_may_lag
+
+from .cache import feed_cache
+
+FEED_ORDERING = ('-pub_date', '-id')
+POSTS_PER_PAGE = 10
+COMMENT_ORDERING = ('-created', '-id')
+COMMENTS_PER_PAGE = 20
+# Сколько номеров страниц показывать вокруг текущей и с краев
+PAGE_WINDOW = 2
+PAGE_ENDS = 1
+COUNT_KEY = 'feed-count:{}'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации, совместимая по интерфейсу с Page."""
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page of %s items>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not self.object_list:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return ''
+        return self.paginator.encode_cursor(
+            self.object_list[0], forward=False
+        )
+
+
+class CursorPaginator:
+    """
+    Пагинация по ключу (pub_date, id): без COUNT(*) и OFFSET,
+    любая страница стоит столько же, сколько первая.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING,
+                 keys=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+        # Поля модели, из которых берутся значения курсора, если сортировка
+        # идет по связанной таблице с теми же значениями
+        self.keys = tuple(keys or self.fields)
+        self.descending = self.ordering[0].startswith('-')
+
+    def encode_cursor(self, obj, forward=True):
+        return self._encode(self._key_values(obj), forward)
+
+    def end_cursor(self, size):
+        """
+        Курсор последней страницы из size самых старых записей:
+        столько, сколько в ней при нумерации с начала, и без OFFSET.
+        """
+        return self._encode(None, False, size)
+
+    def following_cursors(self, obj, pages):
+        """
+        Курсоры pages страниц после obj, начиная со следующей: одна
+        выборка ключей по индексу вместо OFFSET для каждой.
+        """
+        values = self._key_values(obj)
+        rows = self.object_list.order_by(*self.ordering).filter(
+            self._seek(values, True)
+        ).values_list(*self.fields)[:(pages - 1) * self.per_page]
+        boundaries = [values] + list(rows)[self.per_page - 1::self.per_page]
+        return [self._encode(row, True) for row in boundaries[:pages]]
+
+    def _encode(self, values, forward, size=None):
+        if values is not None:
+            values = [
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in values
+            ]
+        data = [values, forward] if size is None else [values, forward, size]
+        payload = json.dumps(data, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode())
+        return token.decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Значения ключа, направление и размер страницы из курсора."""
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            payload = base64.urlsafe_b64decode(cursor + padding)
+            values, forward, *size = json.loads(payload.decode())
+            if values is None and not forward and size:
+                return None, False, max(1, min(int(size[0]), self.per_page))
+            if size or len(values) != len(self.fields):
+                raise ValueError
+            values = [
+                self._model_field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise InvalidCursor(cursor)
+        return values, bool(forward), self.per_page
+
+    def get_page(self, cursor=None):
+        """Как Paginator.get_page: битый курсор дает первую страницу."""
+        values, forward, size = None, True, self.per_page
+        if cursor:
+            try:
+                values, forward, size = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        ordering = self.ordering if forward else self._reversed_ordering()
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        items = list(queryset[:size + 1])
+        has_more = len(items) > size
+        items = items[:size]
+        if forward:
+            return CursorPage(items, self, has_more, values is not None)
+        items.reverse()
+        # Курсор конца ленты: дальше записей нет
+        return CursorPage(items, self, values is not None, has_more)
+
+    def _key_values(self, obj):
+        # Страница может состоять из словарей, если queryset после values()
+        if isinstance(obj, dict):
+            return [obj[key] for key in self.keys]
+        return [
+            self._model_field(key).value_from_object(obj)
+            for key in self.keys
+        ]
+
+    def _model_field(self, name):
+        return self.object_list.model._meta.get_field(name)
+
+    def _reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith('-') else '-' + field
+            for field in self.ordering
+        )
+
+    def _seek(self, values, forward):
+        lookup = 'lt' if self.descending == forward else 'gt'
+        query = Q()
+        for position, field in enumerate(self.fields):
+            condition = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, value in zip(self.fields, values[:position]):
+                condition &= Q(**{previous: value})
+            query |= condition
+        return query
+
+
+def paginate(request, object_list, per_page=POSTS_PER_PAGE,
+             ordering=FEED_ORDERING, keys=None):
+    """
+    Возвращает (paginator, page) для ленты.
+
+    С параметром ?cursor= работает CursorPaginator, иначе обычный
+    Paginator с номерами страниц. Страница строится без COUNT(*): число
+    записей нужно только навигации, его дает count_by_version. Ссылки
+    на следующие страницы окна и на последнюю ведут на курсоры, так что
+    OFFSET остается только у явных ?page=N.
+    """
+    object_list = object_list.order_by(*ordering)
+    cursor_paginator = CursorPaginator(object_list, per_page, ordering, keys)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return cursor_paginator, cursor_paginator.get_page(cursor)
+    paginator = Paginator(object_list, per_page)
+    try:
+        number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        number = 1
+    # Paginator.get_page проверял бы номер через COUNT(*)
+    bottom = (number - 1) * per_page
+    page = Page(object_list[bottom:bottom + per_page], number, paginator)
+    page.next_cursor = SimpleLazyObject(
+        lambda: cursor_paginator.encode_cursor(page[-1])
+        if page.has_next() else ''
+    )
+    page.window_cursors = SimpleLazyObject(
+        lambda: dict(zip(
+            range(number + 1, number + PAGE_WINDOW + 1),
+            cursor_paginator.following_cursors(page[-1], PAGE_WINDOW)
+        )) if page.has_next() else {}
+    )
+    page.last_cursor = SimpleLazyObject(
+        lambda: cursor_paginator.end_cursor(
+            paginator.count - (paginator.num_pages - 1) * per_page
+        )
+    )
+    return paginator, page
+
+
+def count_by_version(paginator, version):
+    """
+    Число записей ленты для Paginator берется из кэша по версии ленты:
+    COUNT(*) раз на версию и только когда его спросит навигация.
+    """
+    if isinstance(paginator, Paginator):
+        paginator.object_list = VersionedCount(paginator.object_list, version)
+
+
+class VersionedCount:
+    """object_list для Paginator: срезы из queryset, count() из кэша."""
+
+    ordered = True
+
+    def __init__(self, queryset, version):
+        self.queryset = queryset
+        self.version = version
+
+    def __getitem__(self, index):
+        return self.queryset[index]
+
+    def count(self):
+        # Версия прочитана до COUNT(*): запись во время подсчета сменит
+        # ее, и устаревшее число никто не прочитает
+        key = COUNT_KEY.format(self.version)
+        cache = feed_cache()
+        total = cache.get(key)
+        if total is None:
+            total = self.queryset.count()
+            if not replica_may_lag():
+                cache.set(key, total, settings.FEED_CACHE_TIMEOUT)
+        return total
+
+
+def cursor_page(request, object_list, per_page, ordering, param='cursor'):
+    """Курсорная страница без номеров: для подгружаемых списков."""
+    paginator = CursorPaginator(object_list, per_page, ordering)
+    return paginator.get_page(request.GET.get(param))
+
+
+def page_window(number, num_pages, on_each_side=PAGE_WINDOW,
+                on_ends=PAGE_ENDS):
+    """
+    Номера страниц для навигации: края и соседи текущей, None на месте
+    пропуска. Длина не зависит от числа страниц, в отличие от page_range.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    numbers = sorted(set(range(1, on_ends + 1)).union(
+        range(max(1, number - on_each_side),
+              min(num_pages, number + on_each_side) + 1),
+        range(num_pages - on_ends + 1, num_pages + 1),
+    ))
+    pages = []
+    for previous, current in zip([0] + numbers, numbers):
+        if current > previous + 1:
+            pages.append(None)
+        pages.append(current)
+    return pages
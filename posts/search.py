@@ -0,0 +1,173 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+POST_TABLE = 'posts_post_search'
+COMMENT_TABLE = 'posts_comment_search'
+# Совпадение в комментарии весит меньше, чем в тексте самого поста
+COMMENT_WEIGHT = 0.5
+WORD = re.compile(r'\w+')
+
+
+def match_expression(query):
+    """
+    Запрос пользователя в синтаксисе MATCH: все слова обязательны,
+    каждое ищется по префиксу, чтобы находились другие окончания.
+    Операторы FTS5 из ввода не проходят: остаются только слова.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query.lower()))
+
+
+class DatabaseSearchBackend:
+    """
+    Поиск без отдельного индекса: LIKE по текстам постов и комментариев.
+
+    Работает на любой базе, но просматривает таблицы целиком; нужен
+    там, где нет FTS5. Новые от старых, без ранжирования.
+    """
+    vendor = None
+
+    def index_post(self, post_id, text):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def index_comment(self, comment_id, post_id, text):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit, offset=0, group_id=None, author_id=None):
+        words = WORD.findall(query.lower())
+        if not words:
+            return []
+        posts = Post.objects.all()
+        for word in words:
+            posts = posts.filter(
+                Q(text__icontains=word) | Q(comments__text__icontains=word)
+            )
+        if group_id is not None:
+            posts = posts.filter(group_id=group_id)
+        if author_id is not None:
+            posts = posts.filter(author_id=author_id)
+        ids = posts.distinct().order_by('-pub_date', '-pk').values_list(
+            'pk', flat=True
+        )
+        return list(ids[offset:offset + limit])
+
+
+class SQLiteSearchBackend:
+    """
+    Полнотекстовый поиск по постам и комментариям на SQLite FTS5.
+
+    Тексты лежат в двух виртуальных таблицах с rowid = id записи,
+    сигналы держат их в актуальном состоянии. Поиск идет по
+    инвертированному индексу FTS5 с ранжированием bm25, без LIKE.
+    """
+    vendor = 'sqlite'
+
+    def index_post(self, post_id, text):
+        self._replace(POST_TABLE, post_id, text)
+
+    def remove_post(self, post_id):
+        self._delete(POST_TABLE, post_id)
+
+    def index_comment(self, comment_id, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {COMMENT_TABLE} WHERE rowid = %s', [comment_id]
+            )
+            cursor.execute(
+                f'INSERT INTO {COMMENT_TABLE} (rowid, text, post_id) '
+                'VALUES (%s, %s, %s)',
+                [comment_id, text or '', post_id]
+            )
+
+    def remove_comment(self, comment_id):
+        self._delete(COMMENT_TABLE, comment_id)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POST_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {POST_TABLE} (rowid, text) '
+                "SELECT id, COALESCE(text, '') FROM posts_post"
+            )
+            cursor.execute(f'DELETE FROM {COMMENT_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {COMMENT_TABLE} (rowid, text, post_id) '
+                'SELECT id, text, post_id FROM posts_comment'
+            )
+            for table in (POST_TABLE, COMMENT_TABLE):
+                cursor.execute(
+                    f"INSERT INTO {table} ({table}) VALUES ('optimize')"
+                )
+
+    def search(self, query, limit, offset=0, group_id=None, author_id=None):
+        """id постов по убыванию релевантности."""
+        match = match_expression(query)
+        if not match:
+            return []
+        conditions, params = [], [match, COMMENT_WEIGHT, match]
+        if group_id is not None:
+            conditions.append('post.group_id = %s')
+            params.append(group_id)
+        if author_id is not None:
+            conditions.append('post.author_id = %s')
+            params.append(author_id)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        params += [limit, offset]
+        # bm25 отрицательный: чем меньше, тем релевантнее
+        sql = (
+            'SELECT hit.post_id FROM ('
+            f'SELECT rowid AS post_id, bm25({POST_TABLE}) AS score '
+            f'FROM {POST_TABLE} WHERE {POST_TABLE} MATCH %s '
+            'UNION ALL '
+            f'SELECT post_id, bm25({COMMENT_TABLE}) * %s AS score '
+            f'FROM {COMMENT_TABLE} WHERE {COMMENT_TABLE} MATCH %s'
+            ') AS hit '
+            'JOIN posts_post AS post ON post.id = hit.post_id '
+            f'{where} '
+            'GROUP BY hit.post_id '
+            'ORDER BY MIN(hit.score), hit.post_id DESC '
+            'LIMIT %s OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _replace(self, table, rowid, text):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [rowid])
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, text) VALUES (%s, %s)',
+                [rowid, text or '']
+            )
+
+    def _delete(self, table, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [rowid])
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        backend = import_string(settings.SEARCH_BACKEND)
+        # Таблицы FTS5 миграция 0011 создает только в SQLite
+        if backend.vendor not in (None, connection.vendor):
+            backend = DatabaseSearchBackend
+        _backend = backend()
+    return _backend
@@ -0,0 +1,170 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import (bump_versions, follow_namespace, graph_namespace,
+                    group_namespace, index_namespace, profile_namespace)
+from .counters import change_comment_count, change_user_stats
+from .models import Comment, Follow, Group, Post
+from .search import get_search_backend
+from .thumbnails import schedule_variants
+from .timeline import get_timeline_backend
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        get_timeline_backend().push(instance)
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    image = instance.__dict__.get('image')
+    instance._loaded_image = getattr(image, 'name', image)
+
+
+@receiver(post_save, sender=Post)
+def build_thumbnails(sender, instance, **kwargs):
+    # Миниатюры собираются заранее, чтобы первый просмотр ленты не ждал
+    image = instance.image
+    if image and image.name != instance._loaded_image:
+        transaction.on_commit(lambda: schedule_variants(image))
+    instance._loaded_image = image.name
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        get_timeline_backend().backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    get_timeline_backend().prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        change_user_stats(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_user_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        change_user_stats(instance.user_id, 'following_count', 1)
+        change_user_stats(instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    change_user_stats(instance.user_id, 'following_count', -1)
+    change_user_stats(instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created and instance.post_id:
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    if instance.post_id:
+        change_comment_count(instance.post_id, -1)
+
+
+def feed_namespaces(author_id, *group_ids):
+    """
+    Ленты, в которых видны посты автора из указанных групп.
+
+    Ленты подписчиков не перечисляются: новый пост меняет их версию
+    строкой ленты подписок, см. follows.follow_feed_version.
+    """
+    namespaces = {index_namespace(), profile_namespace(author_id)}
+    namespaces.update(
+        group_namespace(group_id) for group_id in group_ids if group_id
+    )
+    return namespaces
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Группу могут сменить при редактировании: сбросить нужно обе ленты
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    bump_versions(*feed_namespaces(
+        instance.author_id, instance.group_id, instance._loaded_group_id
+    ))
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    if Comment.post.is_cached(instance):
+        post = (instance.post.author_id, instance.post.group_id)
+    else:
+        post = Post.objects.filter(pk=instance.post_id).values_list(
+            'author_id', 'group_id'
+        ).first()
+    if post is not None:
+        bump_versions(*feed_namespaces(*post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, **kwargs):
+    # Счетчики подписок видны в шапке профилей обоих пользователей
+    bump_versions(
+        follow_namespace(instance.user_id),
+        profile_namespace(instance.user_id),
+        profile_namespace(instance.author_id),
+        graph_namespace(instance.user_id),
+        graph_namespace(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_profile(sender, instance, **kwargs):
+    bump_versions(profile_namespace(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feed(sender, instance, **kwargs):
+    bump_versions(group_namespace(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    get_search_backend().index_post(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    get_search_backend().index_comment(
+        instance.pk, instance.post_id, instance.text
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    get_search_backend().remove_comment(instance.pk)
@@ -0,0 +1,18 @@
+from django import template
+
+from posts.paginators import page_window
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_numbers(page):
+    """
+    {% page_numbers page as numbers %}: окно номеров вокруг текущей,
+    пары (номер, курсор страницы или None); (None, None) — пропуск.
+    """
+    cursors = page.window_cursors
+    return [
+        (number, cursors.get(number) if number else None)
+        for number in page_window(page.number, page.paginator.num_pages)
+    ]
@@ -0,0 +1,48 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts.cards import CARD_TEMPLATE, render_cards
+
+register = template.Library()
+
+
+def _card_renderer(context):
+    card = context.template.engine.get_template(CARD_TEMPLATE)
+    user = context.get('user')
+    # Как у inclusion-тега: карточка получает только пост и пользователя
+    return user, lambda post: card.render(context.new({
+        'post': post,
+        'user': user,
+    }))
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """
+    Карточка поста: {% post_card post %}.
+
+    В отличие от {% include %} шаблон рендерится с контекстом из двух
+    переменных, а не со всем стеком контекста страницы, и берется
+    из кэша карточек.
+    """
+    user, render = _card_renderer(context)
+    return mark_safe(render_cards([post], user, render)[0])
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Карточки всей страницы: {% post_cards page %}, один get_many."""
+    user, render = _card_renderer(context)
+    return mark_safe(''.join(render_cards(posts, user, render)))
+
+
+@register.simple_tag(takes_context=True)
+def cards_for(context, posts):
+    """
+    Пары (пост, карточка) для лент со своей разметкой вокруг карточек:
+    {% cards_for page as cards %}{% for post, card in cards %}...
+    """
+    user, render = _card_renderer(context)
+    posts = list(posts)
+    cards = render_cards(posts, user, render)
+    return [(post, mark_safe(card)) for post, card in zip(posts, cards)]
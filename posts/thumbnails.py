@@ -0,0 +1,147 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+logger = logging.getLogger(__name__)
+
+# Размеры, которые показывают шаблоны: опции должны совпадать
+# с {% thumbnail %} в post_item.html, иначе имя файла будет другим
+POST_IMAGE_VARIANTS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+class ThumbnailWorker:
+    """
+    Фоновая очередь сборки миниатюр на пуле потоков.
+
+    Одна и та же миниатюра не ставится в очередь дважды. При
+    THUMBNAIL_WORKERS = 0 миниатюры собираются сразу, в вызывающем потоке.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = None
+
+    def schedule(self, name, build):
+        if not settings.THUMBNAIL_WORKERS:
+            self._run(name, build)
+            return None
+        with self._lock:
+            if name in self._pending:
+                return self._pending[name]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.THUMBNAIL_WORKERS,
+                    thread_name_prefix='thumbnails'
+                )
+            future = self._executor.submit(self._run, name, build)
+            self._pending[name] = future
+        return future
+
+    def wait(self, timeout=None):
+        """Дождаться всех поставленных задач."""
+        with self._lock:
+            futures = list(self._pending.values())
+        wait(futures, timeout)
+
+    def _run(self, name, build):
+        try:
+            build()
+        except Exception:
+            logger.exception('Не удалось собрать миниатюру %s', name)
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+            if threading.current_thread() is not threading.main_thread():
+                close_old_connections()
+
+
+worker = ThumbnailWorker()
+_local = threading.local()
+
+
+@contextmanager
+def track_fallbacks():
+    """
+    Список миниатюр, вместо которых отдан оригинал: разметку с ними
+    не стоит кэшировать надолго, миниатюра вот-вот появится.
+
+    Блоки вкладываются: карточка внутри фрагмента ленты внутри
+    страницы попадает в списки всех трех.
+    """
+    previous = getattr(_local, 'fallbacks', None)
+    fallbacks = _local.fallbacks = []
+    try:
+        yield fallbacks
+    finally:
+        _local.fallbacks = previous
+        if previous is not None:
+            previous.extend(fallbacks)
+
+
+class AsyncThumbnailBackend(ThumbnailBackend):
+    """
+    Бэкенд sorl, который не ресайзит картинки в запросе.
+
+    Готовая миниатюра берется из хранилища ключей sorl, а если ее еще
+    нет, сборка уходит в фоновую очередь и шаблон получает оригинал.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        thumbnail = ImageFile(
+            self._thumbnail_name(source, geometry_string, dict(options)),
+            default.storage
+        )
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        worker.schedule(
+            thumbnail.name,
+            lambda: self.generate(file_, geometry_string, **options)
+        )
+        fallbacks = getattr(_local, 'fallbacks', None)
+        if fallbacks is not None:
+            fallbacks.append(thumbnail.name)
+        return source
+
+    def generate(self, file_, geometry_string, **options):
+        """Собрать миниатюру синхронно, как обычный бэкенд sorl."""
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _thumbnail_name(self, source, geometry_string, options):
+        # Те же опции по умолчанию, что в ThumbnailBackend.get_thumbnail
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return self._get_thumbnail_filename(source, geometry_string, options)
+
+
+def schedule_variants(image):
+    """Поставить в очередь все размеры картинки поста."""
+    for geometry, options in POST_IMAGE_VARIANTS:
+        default.backend.get_thumbnail(image, geometry, **options)
+
+
+def generate_variants(image):
+    """Собрать все размеры картинки поста прямо сейчас."""
+    for geometry, options in POST_IMAGE_VARIANTS:
+        default.backend.generate(image, geometry, **options)
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+# Сортировка по копиям pub_date/id в самой ленте: так /follow/ читает
+# диапазон индекса (user, pub_date, post) без сортировки
+TIMELINE_ORDERING = ('-timeline_pub_date', '-timeline_post_id')
+TIMELINE_KEYS = ('pub_date', 'id')
+
+
+class DatabaseTimelineBackend:
+    """
+    Лента подписок, разложенная по подписчикам при записи.
+
+    Новый пост копируется в ленту каждого подписчика автора, поэтому
+    /follow/ читает один диапазон индекса (user, pub_date) вместо
+    выборки по всем авторам, на которых подписан пользователь.
+    """
+
+    ordering = TIMELINE_ORDERING
+    keys = TIMELINE_KEYS
+
+    def push(self, post):
+        followers = Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True)
+        TimelineEntry.objects.bulk_create(
+            (
+                self._entry(user_id, post.id, post.author_id, post.pub_date)
+                for user_id in followers.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def backfill(self, user_id, *author_ids):
+        posts = Post.objects.filter(author_id__in=author_ids).values_list(
+            'id', 'author_id', 'pub_date'
+        )
+        TimelineEntry.objects.bulk_create(
+            (
+                self._entry(user_id, post_id, author_id, pub_date)
+                for post_id, author_id, pub_date in posts.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def prune(self, user_id, *author_ids):
+        TimelineEntry.objects.filter(
+            user_id=user_id, author_id__in=author_ids
+        ).delete()
+
+    def rebuild(self):
+        TimelineEntry.objects.all().delete()
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in follows.iterator():
+            self.backfill(user_id, author_id)
+
+    def newest(self, user_id):
+        """id самой новой записи ленты: одна строка индекса ленты."""
+        return TimelineEntry.objects.filter(user_id=user_id).order_by(
+            '-pub_date', '-post'
+        ).values_list('post_id', flat=True).first()
+
+    def feed(self, user, queryset):
+        """
+        Ограничивает queryset постов лентой пользователя.
+
+        Аннотации используют тот же JOIN, что и фильтр по пользователю,
+        поэтому сортировка и курсор идут по индексу ленты.
+        """
+        return queryset.filter(timeline_entries__user=user).annotate(
+            timeline_pub_date=F('timeline_entries__pub_date'),
+            timeline_post_id=F('timeline_entries__post'),
+        )
+
+    @staticmethod
+    def _entry(user_id, post_id, author_id, pub_date):
+        return TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+
+
+_backend = None
+
+
+def get_timeline_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.TIMELINE_BACKEND)()
+    return _backend
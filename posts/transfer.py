@@ -0,0 +1,270 @@
+"""Перенос контента между окружениями файлами JSON Lines."""
+import datetime
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .cache import feed_cache
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 2000
+MEDIA_DIR = 'media'
+
+
+class TransferError(Exception):
+    """Выгрузку нельзя загрузить в эту базу."""
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder обрезает время до миллисекунд, а от точного
+    # pub_date зависят порядок лент и курсоры
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class Table:
+    """
+    Как выгружать и загружать одну модель.
+
+    fields — имя в файле и путь в ORM. Пользователи переносятся по
+    username, остальные записи — со своими id, поэтому связи между
+    файлами не требуют таблицы соответствий в памяти. Зато таблицы
+    с id из файла при загрузке должны быть пустыми, см. import_content.
+    """
+
+    def __init__(self, name, model, fields, users=(), dates=()):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.users = users
+        self.dates = dates
+
+    @property
+    def filename(self):
+        return f'{self.name}.jsonl'
+
+    @property
+    def keeps_ids(self):
+        return 'id' in self.fields
+
+    def rows(self):
+        queryset = self.model.objects.order_by('pk').values_list(
+            *self.fields.values()
+        )
+        for values in queryset.iterator(chunk_size=BATCH_SIZE):
+            yield dict(zip(self.fields, values))
+
+    def build(self, rows):
+        """Объекты модели для пачки строк: один запрос на пользователей."""
+        usernames = {row[name] for row in rows for name in self.users}
+        user_ids = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'id'))
+        objects = []
+        for row in rows:
+            row = dict(row)
+            for name in self.users:
+                username = row.pop(name)
+                if username not in user_ids:
+                    raise TransferError(
+                        f'{self.filename}: нет пользователя {username!r}'
+                    )
+                row[f'{name}_id'] = user_ids[username]
+            for name in self.dates:
+                row[name] = parse_datetime(row[name])
+            objects.append(self.model(**row))
+        return objects
+
+
+TABLES = (
+    Table('users', User, {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'email': 'email',
+        'date_joined': 'date_joined',
+    }, dates=('date_joined',)),
+    Table('groups', Group, {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    }),
+    Table('posts', Post, {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group_id': 'group_id',
+        'image': 'image',
+    }, users=('author',), dates=('pub_date',)),
+    Table('comments', Comment, {
+        'id': 'id',
+        'post_id': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }, users=('author',), dates=('created',)),
+    Table('follows', Follow, {
+        'id': 'id',
+        'user': 'user__username',
+        'author': 'author__username',
+    }, users=('user', 'author')),
+)
+
+
+class Progress:
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+        self.count = 0
+        self.started = time.monotonic()
+
+    def add(self, count):
+        self.count += count
+        elapsed = time.monotonic() - self.started
+        rate = self.count / elapsed if elapsed else 0
+        self.report(f'{self.name}: {self.count} ({rate:.0f} строк/с)')
+
+
+def export_content(directory, report, media=False):
+    os.makedirs(directory, exist_ok=True)
+    encoder = ExportEncoder(ensure_ascii=False)
+    for table in TABLES:
+        progress = Progress(report, table.name)
+        path = os.path.join(directory, table.filename)
+        with open(path, 'w', encoding='utf-8') as output:
+            rows = table.rows()
+            while True:
+                batch = list(islice(rows, BATCH_SIZE))
+                if not batch:
+                    break
+                output.writelines(encoder.encode(row) + '\n' for row in batch)
+                progress.add(len(batch))
+                if media and table.model is Post:
+                    copy_images(
+                        batch, settings.MEDIA_ROOT,
+                        os.path.join(directory, MEDIA_DIR)
+                    )
+
+
+def import_content(directory, report, media=False):
+    """
+    Загружает выгрузку пачками, каждая пачка — своей транзакцией.
+
+    Пользователи сопоставляются по username: уже заведенные остаются
+    как есть. Остальные записи приходят со своими id, поэтому при любой
+    записи в их таблицах загрузка отменяется до начала: иначе
+    комментарии из файла достались бы чужим постам с теми же id.
+    Ошибка посреди загрузки оставляет уже записанные пачки.
+    """
+    tables = [
+        table for table in TABLES
+        if os.path.exists(os.path.join(directory, table.filename))
+    ]
+    filled = [
+        table.name for table in tables
+        if table.keeps_ids and table.model.objects.exists()
+    ]
+    if filled:
+        raise TransferError(
+            'Загрузка возможна только в пустые таблицы, уже есть записи: '
+            + ', '.join(filled)
+        )
+    try:
+        for table in tables:
+            _import_table(directory, table, report, media)
+    except TransferError as error:
+        raise TransferError(
+            f'{error}; записанные до ошибки пачки остались в базе'
+        )
+    finally:
+        # id пришли из файла: последовательности надо сдвинуть за максимум
+        models = [table.model for table in TABLES]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+
+def _import_table(directory, table, report, media):
+    progress = Progress(report, table.name)
+    path = os.path.join(directory, table.filename)
+    with open(path, encoding='utf-8') as source, \
+            original_dates(table.model):
+        rows = (json.loads(line) for line in source if line.strip())
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            if table.model is User:
+                for row in batch:
+                    row['password'] = make_password(None)
+            if media and table.model is Post:
+                copy_images(
+                    batch, os.path.join(directory, MEDIA_DIR),
+                    settings.MEDIA_ROOT
+                )
+            with transaction.atomic():
+                # Пользователь с тем же username уже есть: связи из
+                # файла пойдут на него
+                table.model.objects.bulk_create(
+                    table.build(batch), ignore_conflicts=not table.keeps_ids
+                )
+            progress.add(len(batch))
+
+
+def rebuild_derived_data(stdout):
+    """
+    bulk_create не вызывает сигналы: после массовой записи ленты,
+    счетчики и поиск пересобираются целиком, а кэш лент сбрасывается.
+    """
+    call_command('rebuild_timelines', stdout=stdout)
+    call_command('rebuild_counters', stdout=stdout)
+    call_command('rebuild_search_index', stdout=stdout)
+    feed_cache().clear()
+
+
+@contextmanager
+def original_dates(model):
+    """
+    bulk_create проставляет auto_now_add текущим временем:
+    на время импорта отключаем это, чтобы сохранить даты из файла.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def copy_images(rows, source_root, target_root):
+    for row in rows:
+        name = row.get('image')
+        # Имена берутся из файла: наружу из MEDIA_ROOT не пишем
+        if not name or os.path.isabs(name) or '..' in name.split('/'):
+            continue
+        source = os.path.join(source_root, name)
+        target = os.path.join(target_root, name)
+        if os.path.exists(target) or not os.path.exists(source):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
@@ -0,0 +1,97 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+
+class OversizedUpload(UploadedFile):
+    """
+    Заглушка вместо файла, который не влез в UPLOAD_MAX_SIZE.
+
+    Обработчик стоит для всех форм, а понятную ошибку показывает только
+    PostForm. Для остальных заглушка — пустой файл: стандартные поля
+    отклоняют его как пустой, не падая на чтении.
+    """
+
+    def __init__(self, name, content_type, size, charset):
+        super().__init__(BytesIO(), name, content_type, 0, charset)
+        self.received_size = size
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загрузки на диск кусками, не держа файл в памяти.
+
+    Как только файл превышает UPLOAD_MAX_SIZE, временный файл удаляется,
+    остаток потока пропускается, а форма получает OversizedUpload.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.oversized = (
+            self.content_length is not None
+            and self.content_length > settings.UPLOAD_MAX_SIZE
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.oversized:
+            return None
+        if start + len(raw_data) > settings.UPLOAD_MAX_SIZE:
+            self.oversized = True
+            self.file.close()
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.oversized:
+            self.file.close()
+            return OversizedUpload(
+                self.file_name, self.content_type, file_size, self.charset
+            )
+        return super().file_complete(file_size)
+
+
+def shrink_image(uploaded):
+    """
+    Уменьшает картинку до POST_IMAGE_MAX_SIDE и пережимает в JPEG.
+
+    JPEG в пределах размера сохраняется как есть. Большие JPEG
+    декодируются сразу в уменьшенном масштабе (draft), так что
+    память не растет с разрешением исходника.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    uploaded.seek(0)
+    with Image.open(uploaded) as image:
+        if image.format == 'JPEG' and max(image.size) <= max_side:
+            uploaded.seek(0)
+            return uploaded
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        image = _flatten(image)
+        output = BytesIO()
+        image.save(
+            output,
+            'JPEG',
+            quality=settings.POST_IMAGE_QUALITY,
+            optimize=True,
+            progressive=True
+        )
+    name = os.path.splitext(os.path.basename(uploaded.name))[0] + '.jpg'
+    return ContentFile(output.getvalue(), name=name)
+
+
+def _flatten(image):
+    # У JPEG нет прозрачности: кладем картинку на белый фон
+    if image.mode in ('RGB', 'L'):
+        return image
+    if image.mode not in ('RGBA', 'LA', 'P'):
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
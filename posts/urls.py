@@ -8,6 +8,7 @@ urlpatterns = [
     path("new", views.new_post, name="new_post"),
     path("", views.index, name="index"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search, name="search"),
     path("<str:username>/follow/", views.profile_follow, name="profile_follow"),
     path("<str:username>/unfollow/", views.profile_unfollow, name="profile_unfollow"),
     path('<str:username>/', views.profile, name='profile'),
@@ -17,5 +18,10 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments_more,
+        name='post_comments'
+    ),
     path("<username>/<int:post_id>/comment", views.add_comment, name="add_comment"),
 ]
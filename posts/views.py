@@ -1,34 +1,64 @@
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 
+from .authors import author_summary
+from .cache import (feed_version, group_namespace, index_namespace,
+                    profile_namespace)
+from .concurrent import fetch
+from .feeds import feed_posts, post_comments
+from .follows import follow, follow_feed_version, unfollow
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import Group, Post, User
+from .pagecache import (anonymous_page_cache, group_scope, index_scope,
+                        post_scope, profile_scope)
+from .paginators import (COMMENT_ORDERING, COMMENTS_PER_PAGE, POSTS_PER_PAGE,
+                          count_by_version, cursor_page, paginate)
+from .search import get_search_backend
+from .timeline import get_timeline_backend
+
 
+def _loaded_page(request, post_list):
+    """Страница ленты, уже прочитанная из базы, а не ленивый срез."""
+    paginator, page = paginate(request, post_list)
+    page.object_list = list(page.object_list)
+    return paginator, page
 
+
+@anonymous_page_cache(index_scope)
 def index(request):
-    post_list = Post.objects.select_related('group').order_by('-pub_date')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = feed_posts()
+    paginator, page = paginate(request, post_list)
+    version = feed_version(index_namespace())
+    count_by_version(paginator, version)
     context = {
         'page': page,
         'paginator': paginator,
+        'feed_version': version,
     }
     return render(request, 'index.html', context)
 
 
+@anonymous_page_cache(group_scope)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = feed_posts(group__slug=slug)
+    data = fetch(
+        group=partial(get_object_or_404, Group, slug=slug),
+        page=partial(_loaded_page, request, posts),
+    )
+    group = data['group']
+    paginator, page = data['page']
+    version = feed_version(group_namespace(group.pk))
+    count_by_version(paginator, version)
     context = {
         'page': page,
         'group': group,
-        'posts': posts,
         'paginator': paginator,
+        'feed_version': version,
     }
     return render(request, 'group.html', context)
 
@@ -38,135 +68,131 @@ def new_post(request):
     if request.method != 'POST':
         form = PostForm()
         return render(request, 'new.html', {'form': form})
-    form = PostForm(request.POST)
+    form = PostForm(request.POST, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         form.save()
         return redirect('index')
-    form = PostForm()
     return render(request, 'new.html', {'form': form})
 
 
+@anonymous_page_cache(profile_scope)
 def profile(request, username):
-    user_id = get_object_or_404(User, username=username)
-    post_list = Post.objects.select_related('author').filter(
-        author=user_id).order_by('-pub_date')
-    count = Post.objects.select_related(
-        'author').filter(author=user_id).count()
-    countfollowing = Follow.objects.filter(
-        user=user_id).count()
-    countfollower = Follow.objects.filter(
-        author=user_id).count()
-    if request.user.is_authenticated:
-        following = False
-        if Follow.objects.filter(author=user_id, user=request.user).exists():
-            following = True
-    else:
-        following = False
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = feed_posts(author__username=username)
+    data = fetch(
+        author=partial(author_summary, username, request.user),
+        page=partial(_loaded_page, request, post_list),
+    )
+    user_id, following = data['author']
+    if user_id is None:
+        raise Http404
+    paginator, page = data['page']
+    version = feed_version(profile_namespace(user_id.pk))
+    count_by_version(paginator, version)
+    stats = user_id.stats
     context = {
         'page': page,
         'author': user_id,
-        'count': count,
+        'count': stats.posts_count,
         'paginator': paginator,
         'profile': user_id,
-        'countfollower': countfollower,
-        'countfollowing': countfollowing,
+        'countfollower': stats.followers_count,
+        'countfollowing': stats.following_count,
         'following': following,
+        'feed_version': version,
     }
     return render(request, 'profile.html', context)
 
 
+@anonymous_page_cache(post_scope)
 def post_view(request, username, post_id):
-    username = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, pk=post_id, author=username)
-    countfollowing = Follow.objects.filter(
-        user=username).count()
-    countfollower = Follow.objects.filter(
-        author=username).count()
-    count = Post.objects.select_related(
-        'author').filter(author=username).count()
-    all_comments = Comment.objects.filter(post_id=post_id)
-    if request.method != 'POST':
-        form = CommentForm()
-        context = {
-            'post': post,
-            'author': username,
-            'count': count,
-            'username': username,
-            'post_id': post_id,
-            'comments': all_comments,
-            'form': form,
-            'countfollower': countfollower,
-            'countfollowing': countfollowing,
-        }
-        return render(request, 'post.html', context)
-    form = CommentForm(request.POST)
-    if form.is_valid():
-        comments = form.save(commit=False)
-        comments.author = request.user
-        comments.post_id = post_id
-        form.save()
-        return redirect('post', username=username, post_id=post_id)
-    form = CommentForm()
+    if request.method == 'POST':
+        return add_comment(request, username, post_id)
+    return _post_page(request, username, post_id, CommentForm())
+
+
+def _post_page(request, username, post_id, form):
+    all_comments = post_comments(post_id)
+    data = fetch(
+        author=partial(author_summary, username),
+        post=partial(
+            get_object_or_404,
+            feed_posts(author__username=username), pk=post_id
+        ),
+        comments_page=partial(
+            cursor_page, request, all_comments, COMMENTS_PER_PAGE,
+            COMMENT_ORDERING, param='comments'
+        ),
+    )
+    username = data['author'][0]
+    post = data['post']
+    stats = username.stats
     context = {
         'post': post,
         'author': username,
-        'count': count,
+        'count': stats.posts_count,
         'username': username,
         'post_id': post_id,
         'comments': all_comments,
+        'comments_page': data['comments_page'],
         'form': form,
+        'countfollower': stats.followers_count,
+        'countfollowing': stats.following_count,
     }
     return render(request, 'post.html', context)
 
 
+@anonymous_page_cache(post_scope)
+def post_comments_more(request, username, post_id):
+    posts = Post.objects.filter(pk=post_id, author__username=username)
+    if not posts.exists():
+        raise Http404
+    comments_page = cursor_page(
+        request, post_comments(post_id), COMMENTS_PER_PAGE,
+        COMMENT_ORDERING, param='comments'
+    )
+    context = {
+        'comments_page': comments_page,
+        'username': username,
+        'post_id': post_id,
+    }
+    return render(request, 'comment_list.html', context)
+
+
 @login_required
 def add_comment(request, username, post_id):
-    username = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, pk=post_id, author=username)
-    countfollowing = Follow.objects.filter(
-        user=username).count()
-    countfollower = Follow.objects.filter(
-        author=username).count()
-    count = Post.objects.select_related(
-        'author').filter(author=username).count()
-    all_comments = Comment.objects.filter(post_id=post_id)
+    """
+    Запись комментария: одна выборка поста по ключу и вставка.
+
+    Счетчики, ленты и поиск обновляют сигналы. Страница поста
+    собирается заново только для формы с ошибками, AJAX-запрос
+    получает JSON с разметкой нового комментария.
+    """
     if request.method != 'POST':
-        form = CommentForm()
-        context = {
-            'post': post,
-            'author': username,
-            'count': count,
+        return post_view(request, username, post_id)
+    # Автор и группа нужны сигналам, чтобы сбросить ленты без запроса
+    post = get_object_or_404(
+        Post.objects.only('author_id', 'group_id'),
+        pk=post_id, author__username=username
+    )
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        if request.is_ajax():
+            return JsonResponse({'errors': form.errors}, status=400)
+        return _post_page(request, username, post_id, form)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
+    if request.is_ajax():
+        html = render_to_string('comment_list.html', {
+            'comments_page': [comment],
             'username': username,
             'post_id': post_id,
-            'comments': all_comments,
-            'form': form,
-            'countfollower': countfollower,
-            'countfollowing': countfollowing,
-        }
-        return render(request, 'post.html', context)
-    form = CommentForm(request.POST)
-    if form.is_valid():
-        comments = form.save(commit=False)
-        comments.author = request.user
-        comments.post_id = post_id
-        form.save()
-        return redirect('post', username=username, post_id=post_id)
-    form = CommentForm()
-    context = {
-        'post': post,
-        'author': username,
-        'count': count,
-        'username': username,
-        'post_id': post_id,
-        'comments': all_comments,
-        'form': form,
-    }
-    return render(request, 'post.html', context)
+        }, request)
+        return JsonResponse({'id': comment.pk, 'html': html}, status=201)
+    return redirect('post', username=username, post_id=post_id)
 
 
 @login_required
@@ -189,9 +215,9 @@ def post_edit(request, username, post_id):
                     instance=post)
     if form.is_valid():
         post = form.save(commit=False)
-        form.save()
+        # comment_count обновляют сигналы, сохраняем только поля формы
+        post.save(update_fields=PostForm.Meta.fields)
         return redirect('post', username=username, post_id=post_id)
-    form = PostForm()
     context = {
         'form': form,
         'post': post,
@@ -201,17 +227,18 @@ def post_edit(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    follow_list = []
-    follow_list_id = Follow.objects.filter(user=request.user).in_bulk()
-    for i in follow_list_id:
-        follow_list.append(follow_list_id[i].author)
-    post_list = Post.objects.filter(author__in=follow_list)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    timeline = get_timeline_backend()
+    post_list = timeline.feed(request.user, feed_posts())
+    paginator, page = paginate(
+        request, post_list, ordering=timeline.ordering, keys=timeline.keys
+    )
+    version = follow_feed_version(request.user.pk)
+    count_by_version(paginator, version)
     context = {
         'page': page,
         'paginator': paginator,
+        'feed_version': version,
+        'feed_cache_timeout': settings.FOLLOW_FEED_CACHE_TIMEOUT,
     }
     return render(request, "follow.html", context)
 
@@ -219,19 +246,47 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user == author:
-        return follow_index(request)
-    Follow.objects.get_or_create(user=request.user, author=author)
-    return profile(request, username)
+    follow(request.user.pk, [author.pk])
+    return redirect('profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user == author:
-        return profile(request, username)
-    Follow.objects.filter(author=author, user=request.user).delete()
-    return profile(request, username)
+    unfollow(request.user.pk, [author.pk])
+    return redirect('profile', username=username)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    try:
+        number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        number = 1
+    # Лишний id показывает, есть ли следующая страница, без COUNT(*)
+    ids = get_search_backend().search(
+        query,
+        POSTS_PER_PAGE + 1,
+        (number - 1) * POSTS_PER_PAGE,
+        group_id=group and group.pk,
+        author_id=author and author.pk,
+    )
+    posts = feed_posts().in_bulk(ids[:POSTS_PER_PAGE])
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.only('slug', 'title'),
+        'results': [posts[pk] for pk in ids[:POSTS_PER_PAGE] if pk in posts],
+        'number': number,
+        'has_next': len(ids) > POSTS_PER_PAGE,
+    }
+    return render(request, 'search.html', context)
 
 
 def page_not_found(request, exception):
@@ -1,4 +1,22 @@
+import pytest
+from django.core.cache import caches
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Кэш страниц живет между тестами, а ответ из кэша без context
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def build_thumbnails_inline(settings, tmp_path):
+    # Фоновые потоки не должны переживать тест и его базу,
+    # а загрузки и миниатюры — попадать в media/ репозитория
+    settings.THUMBNAIL_WORKERS = 0
+    settings.MEDIA_ROOT = str(tmp_path)
@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Post
+
+
+def make_posts(author, count, **kwargs):
+    return [
+        Post.objects.create(text=f'Пост {i}', author=author, **kwargs)
+        for i in range(count)
+    ]
+
+
+class TestApi:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_posts_cursor_pages(self, client, user):
+        make_posts(user, 15)
+        first = client.get('/api/v1/posts/').json()
+        assert [post['text'] for post in first['results']] == \
+            [f'Пост {i}' for i in range(14, 4, -1)]
+        assert first['previous'] is None
+        second = client.get(f'/api/v1/posts/?cursor={first["next"]}').json()
+        assert [post['text'] for post in second['results']] == \
+            [f'Пост {i}' for i in range(4, -1, -1)], \
+            'Проверьте, что `next` ведет на следующую страницу'
+        assert second['next'] is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_fields(self, client, post_with_group):
+        response = client.get(f'/api/v1/posts/{post_with_group.pk}/')
+        data = response.json()
+        assert data['author'] == post_with_group.author.username
+        assert data['group'] == post_with_group.group.slug
+        assert set(data) == {
+            'id', 'text', 'pub_date', 'author', 'group', 'image', 'comment_count'
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sparse_fields(self, client, user):
+        make_posts(user, 3)
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get('/api/v1/posts/?fields=id,text').json()
+        assert all(set(post) == {'id', 'text'} for post in data['results']), \
+            'Проверьте, что `?fields=` ограничивает поля ответа'
+        assert 'auth_user' not in queries[-1]['sql'], \
+            'Проверьте, что ненужные поля не попадают в запрос'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_unknown_fields(self, client):
+        response = client.get('/api/v1/posts/?fields=id,password')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_group_and_profile(self, client, user, group):
+        make_posts(user, 2, group=group)
+        make_posts(user, 1)
+        data = client.get(f'/api/v1/groups/{group.slug}/posts/').json()
+        assert len(data['results']) == 2
+        assert client.get('/api/v1/groups/').json()['results'][0]['slug'] == group.slug
+        profile = client.get(f'/api/v1/profiles/{user.username}/').json()
+        assert profile['posts_count'] == 3
+        posts = client.get(f'/api/v1/profiles/{user.username}/posts/').json()
+        assert len(posts['results']) == 3
+        assert client.get('/api/v1/profiles/Nobody/').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments(self, client, user, post):
+        for i in range(3):
+            Comment.objects.create(post=post, author=user, text=f'Комментарий {i}')
+        data = client.get(f'/api/v1/posts/{post.pk}/comments/?limit=2').json()
+        assert [item['text'] for item in data['results']] == ['Комментарий 2', 'Комментарий 1']
+        assert data['next']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_feed(self, user_client, user, django_user_model):
+        author = django_user_model.objects.create_user(username='Author')
+        make_posts(author, 12)
+        Follow.objects.create(user=user, author=author)
+        assert Client().get('/api/v1/follow/').status_code == 401
+        first = user_client.get('/api/v1/follow/').json()
+        second = user_client.get(f'/api/v1/follow/?cursor={first["next"]}').json()
+        assert len(first['results']) + len(second['results']) == 12
+        assert not {p['id'] for p in first['results']} & {p['id'] for p in second['results']}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_read_only(self, user_client):
+        assert user_client.post('/api/v1/posts/').status_code == 405
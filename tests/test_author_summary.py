@@ -0,0 +1,88 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.authors import SUMMARY_KEY, author_summary
+from posts.cache import feed_cache
+from posts.counters import get_user_stats
+from posts.models import Follow, Post
+
+
+@pytest.fixture
+def author():
+    author = get_user_model().objects.create_user(username='SummaryAuthor')
+    get_user_stats(author)
+    return author
+
+
+def summary_queries(*args):
+    with CaptureQueriesContext(connection) as captured:
+        result = author_summary(*args)
+    return result, len(captured)
+
+
+class TestAuthorSummary:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_one_query_then_cache(self, author, user):
+        Post.objects.create(text='Пост', author=author)
+        Follow.objects.create(user=user, author=author)
+        (summary, following), queries = summary_queries(author.username, user)
+        assert queries == 1, \
+            'Проверьте, что автор, счетчики и подписка загружаются одним запросом'
+        assert following is True
+        assert (summary.stats.posts_count, summary.stats.followers_count) == (1, 1)
+
+        summary_queries(author.username)
+        (summary, following), queries = summary_queries(author.username)
+        assert queries == 0, 'Проверьте, что шапка автора берется из кэша'
+        assert following is False
+        (summary, following), queries = summary_queries(author.username, user)
+        assert queries == 1 and following is True
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cache_holds_header_only(self, author):
+        for _ in range(2):
+            author_summary(author.username)
+        header, version = feed_cache().get(SUMMARY_KEY.format(author.pk))
+        assert author.password not in repr(header), \
+            'Проверьте, что хеш пароля не попадает в общий кэш'
+        assert set(header) == {
+            'id', 'username', 'first_name', 'last_name',
+            'posts_count', 'followers_count', 'following_count',
+        }
+        summary, _ = author_summary(author.username)
+        assert (summary.pk, summary.username) == (author.pk, author.username)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_writes_invalidate(self, author, user):
+        for _ in range(2):
+            author_summary(author.username)
+        Follow.objects.create(user=user, author=author)
+        summary, _ = author_summary(author.username)
+        assert summary.stats.followers_count == 1, \
+            'Проверьте, что подписка сбрасывает кэш шапки автора'
+        author_summary(author.username)
+        Post.objects.create(text='Пост', author=author)
+        summary, _ = author_summary(author.username)
+        assert summary.stats.posts_count == 1
+
+        old_name = author.username
+        author.username = 'RenamedAuthor'
+        author.save()
+        assert author_summary(old_name) == (None, False), \
+            'Проверьте, что переименованный автор не находится по старому имени'
+        assert author_summary('RenamedAuthor')[0].pk == author.pk
+
+    @pytest.mark.django_db(transaction=True)
+    def test_profile_follow_state(self, user_client, user, author):
+        url = f'/{author.username}/'
+        for _ in range(2):
+            assert user_client.get(url).context['following'] is False
+        Follow.objects.create(user=user, author=author)
+        response = user_client.get(url)
+        assert response.context['following'] is True
+        assert response.context['countfollower'] == 1, \
+            'Проверьте, что профиль показывает свежие счетчики после подписки'
+        assert user_client.get('/MissingAuthor/').status_code == 404
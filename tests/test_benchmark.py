@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from posts.benchmark import compare, measure, percentile
+from posts.models import Comment, Follow, Post
+
+
+class TestLoadData:
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        assert percentile(samples, 50) == 50
+        assert percentile(samples, 99) == 99
+        assert percentile([5], 90) == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_generator_and_benchmark(self, tmp_path):
+        call_command(
+            'generate_load_data', '--users', '20', '--groups', '2',
+            '--posts-per-author', '3', '--follows-per-user', '4',
+            '--comments-per-post', '2', '--distribution', 'fixed', '--seed', '1',
+        )
+        assert Post.objects.count() == 60
+        assert Comment.objects.count() == 120
+        assert Follow.objects.count() == 80
+        assert Post.objects.filter(comment_count=2).count() == 60, \
+            'Проверьте, что после генерации пересчитываются счетчики'
+
+        output = tmp_path / 'bench.json'
+        call_command('benchmark_views', '--requests', '3', '--output', str(output))
+        report = json.loads(output.read_text())
+        assert report['dataset']['posts'] == 60
+        assert set(report['views']) == {'index', 'group', 'profile', 'follow', 'post'}
+        for result in report['views'].values():
+            assert result['p50_ms'] <= result['p99_ms']
+            assert result['queries'] > 0
+        assert compare(report, report)[0].startswith('index: p50_ms')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_measure_counts_pool_queries(self, settings, post_with_group):
+        url = f'/group/{post_with_group.group.slug}/'
+        pooled = measure(Client(), url, 1, cold=True)['queries']
+        settings.VIEW_FETCH_WORKERS = 0
+        inline = measure(Client(), url, 1, cold=True)['queries']
+        assert pooled == inline, \
+            'Проверьте, что бенчмарк считает запросы из пула posts.concurrent'
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment
+from posts.paginators import COMMENTS_PER_PAGE
+
+
+def add_comments(post, count):
+    authors = [
+        get_user_model().objects.get_or_create(username=f'Commenter{i}')[0]
+        for i in range(3)
+    ]
+    for i in range(count):
+        Comment.objects.create(
+            post=post, author=authors[i % 3], text=f'Комментарий {i}'
+        )
+
+
+def shown(content):
+    return re.findall(r'Комментарий \d+', content)
+
+
+class TestCommentPages:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_page_shows_first_comments(self, user_client, post):
+        add_comments(post, COMMENTS_PER_PAGE + 5)
+        response = user_client.get(f'/{post.author.username}/{post.pk}/')
+        comments = shown(response.content.decode())
+        assert len(comments) == COMMENTS_PER_PAGE, \
+            'Проверьте, что на странице поста показывается одна страница комментариев'
+        assert comments[0] == f'Комментарий {COMMENTS_PER_PAGE + 4}', \
+            'Проверьте, что сначала показываются новые комментарии'
+        assert 'js-more-comments' in response.content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_more_comments_fragment(self, client, post):
+        add_comments(post, COMMENTS_PER_PAGE + 5)
+        page = client.get(f'/{post.author.username}/{post.pk}/')
+        cursor = page.context['comments_page'].next_cursor
+        response = client.get(
+            f'/{post.author.username}/{post.pk}/comments/?comments={cursor}'
+        )
+        content = response.content.decode()
+        assert response.status_code == 200
+        assert '<html' not in content, 'Проверьте, что отдается только фрагмент'
+        assert shown(content) == [f'Комментарий {i}' for i in range(4, -1, -1)]
+        assert 'js-more-comments' not in content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fragment_checks_author(self, client, post):
+        response = client.get(f'/Nobody/{post.pk}/comments/')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_query_count_does_not_grow(self, user_client, post):
+        url = f'/{post.author.username}/{post.pk}/'
+        add_comments(post, 3)
+        # Первый запрос еще создает счетчики автора
+        user_client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            user_client.get(url)
+        Comment.objects.all().delete()
+        add_comments(post, COMMENTS_PER_PAGE * 3)
+        with CaptureQueriesContext(connection) as large:
+            user_client.get(url)
+        assert len(small) == len(large), \
+            'Проверьте, что число запросов на странице поста не зависит от числа комментариев'
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.cache import feed_version, profile_namespace
+from posts.models import Comment, Post
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class TestCommentWrite:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_skips_page_work(self, user_client, post):
+        url = f'/{post.author.username}/{post.pk}/comment'
+        version = feed_version(profile_namespace(post.author_id))
+        with CaptureQueriesContext(connection) as captured:
+            response = user_client.post(url, {'text': 'Быстрый'})
+        assert response.status_code == 302
+        queries = [query['sql'] for query in captured]
+        assert not any('posts_userstats' in sql for sql in queries), \
+            'Проверьте, что запись комментария не загружает счетчики автора'
+        insert = next(
+            i for i, sql in enumerate(queries)
+            if sql.startswith('INSERT INTO "posts_comment"')
+        )
+        assert not [
+            sql for sql in queries[insert:]
+            if sql.startswith('SELECT') and 'FROM "posts_post"' in sql
+        ], 'Проверьте, что после вставки пост не перечитывается для сигналов'
+        post.refresh_from_db()
+        assert post.comment_count == 1
+        assert feed_version(profile_namespace(post.author_id)) != version, \
+            'Проверьте, что комментарий сбрасывает кэш лент'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_json_mode(self, user_client, post):
+        url = f'/{post.author.username}/{post.pk}/comment'
+        response = user_client.post(url, {'text': 'Через AJAX'}, **AJAX)
+        assert response.status_code == 201
+        data = response.json()
+        assert data['id'] == Comment.objects.get().pk
+        assert 'Через AJAX' in data['html']
+
+        response = user_client.post(url, {'text': ''}, **AJAX)
+        assert response.status_code == 400
+        assert 'text' in response.json()['errors']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_missing_post(self, user_client, post):
+        other = Post.objects.create(text='Чужой', author=post.author)
+        response = user_client.post(
+            f'/someone/{other.pk}/comment', {'text': 'Мимо'}
+        )
+        assert response.status_code == 404
+        assert not Comment.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalid_form_renders_post(self, user_client, post):
+        url = f'/{post.author.username}/{post.pk}/'
+        response = user_client.post(url, {'text': ''})
+        assert response.status_code == 200
+        assert response.context['form'].errors, \
+            'Проверьте, что форма с ошибкой возвращается на страницу поста'
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+from django.db import connection, connections, transaction
+from django.http import Http404
+
+from posts.concurrent import fetch
+from posts.models import Post
+from yatube.instrumentation import RequestStats, _local
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+class TestConcurrentFetch:
+
+    def test_inline_without_workers(self, settings):
+        settings.VIEW_FETCH_WORKERS = 0
+        names = fetch(a=thread_name, b=thread_name)
+        assert set(names.values()) == {threading.current_thread().name}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_parallel_tasks(self, post):
+        names = fetch(
+            main=thread_name,
+            pool=thread_name,
+            count=Post.objects.count,
+        )
+        assert names['main'] == threading.current_thread().name
+        assert names['pool'].startswith('fetch'), \
+            'Проверьте, что независимые задачи уходят в пул потоков'
+        assert names['count'] == 1, \
+            'Проверьте, что потоки пула читают ту же базу'
+
+        def missing():
+            raise Http404
+        with pytest.raises(Http404):
+            fetch(main=thread_name, missing=missing)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_inline_in_transaction(self):
+        with transaction.atomic():
+            names = fetch(a=thread_name, b=thread_name)
+        assert set(names.values()) == {threading.current_thread().name}, \
+            'Проверьте, что внутри транзакции задачи не уходят в пул'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_queries_are_measured(self, post):
+        _local.stats = stats = RequestStats()
+        try:
+            with connection.execute_wrapper(stats.record_query):
+                fetch(a=Post.objects.count, b=Post.objects.count)
+        finally:
+            _local.stats = None
+        assert stats.query_count == 2, \
+            'Проверьте, что запросы из пула попадают в замеры'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pool_keeps_connections(self, post, monkeypatch):
+        closed = []
+        close = type(connections['default']).close
+
+        def spy(db):
+            closed.append(thread_name())
+            close(db)
+        # Тестовая база в памяти не закрывается, поэтому считаем вызовы
+        monkeypatch.setattr(type(connections['default']), 'close', spy)
+        for _ in range(5):
+            fetch(a=Post.objects.count, b=Post.objects.count)
+        assert not closed, \
+            'Проверьте, что поток пула не открывает соединение на каждую задачу'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_views(self, client, post_with_group):
+        author = post_with_group.author.username
+        response = client.get(f'/{author}/')
+        assert response.context['count'] == 1
+        assert list(response.context['page']) == [post_with_group]
+        response = client.get(f'/{author}/{post_with_group.pk}/')
+        assert response.context['post'] == post_with_group
+        assert client.get(f'/{author}/0/').status_code == 404
+        assert client.get('/group/missing/').status_code == 404
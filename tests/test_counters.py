@@ -0,0 +1,78 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from posts.counters import get_user_stats
+from posts.models import Comment, Follow, Post, UserStats
+
+
+@pytest.fixture
+def reader():
+    return get_user_model().objects.create_user(username='CounterReader')
+
+
+class TestCounters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_counters_follow_writes(self, user, reader):
+        stats = get_user_stats(user)
+        assert (stats.posts_count, stats.followers_count) == (0, 0)
+        get_user_stats(reader)
+
+        post = Post.objects.create(text='Пост', author=user)
+        Follow.objects.create(user=reader, author=user)
+        Comment.objects.create(post=post, author=reader, text='Коммент')
+
+        stats = get_user_stats(user)
+        assert stats.posts_count == 1, 'Проверьте, что счетчик записей растет при создании поста'
+        assert stats.followers_count == 1, 'Проверьте, что счетчик подписчиков растет при подписке'
+        assert get_user_stats(reader).following_count == 1
+        post.refresh_from_db()
+        assert post.comment_count == 1, 'Проверьте, что счетчик комментариев растет'
+
+        Comment.objects.all().delete()
+        Follow.objects.all().delete()
+        post.delete()
+        stats = get_user_stats(user)
+        assert (stats.posts_count, stats.followers_count) == (0, 0)
+        assert get_user_stats(reader).following_count == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_stats_are_built_lazily_from_tables(self, user):
+        Post.objects.bulk_create([Post(text='Пост', author=user)] * 3)
+        assert not UserStats.objects.filter(user=user).exists()
+        assert get_user_stats(user).posts_count == 3
+        assert UserStats.objects.filter(user=user, posts_count=3).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rebuild_counters_fixes_drift(self, user, reader):
+        post = Post.objects.create(text='Пост', author=user)
+        get_user_stats(user)
+        Comment.objects.bulk_create([Comment(post=post, author=reader, text='1')])
+        Post.objects.bulk_create([Post(text='Без сигнала', author=user)])
+
+        call_command('rebuild_counters')
+        post.refresh_from_db()
+        assert post.comment_count == 1
+        assert get_user_stats(user).posts_count == 2
+        assert UserStats.objects.filter(user=reader).exists(), \
+            'Проверьте, что `rebuild_counters` создает недостающие счетчики'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rebuild_counters_refreshes_feeds(self, client, user, reader):
+        post = Post.objects.create(text='Пост', author=user)
+        Comment.objects.create(post=post, author=reader, text='1')
+        assert 'Комментариев: 1' in client.get('/').content.decode()
+        Comment.objects.bulk_create([Comment(post=post, author=reader, text='2')])
+        call_command('rebuild_counters')
+        assert 'Комментариев: 2' in client.get('/').content.decode(), \
+            'Проверьте, что `rebuild_counters` сбрасывает кэш лент'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_profile_uses_stored_counters(self, client, user):
+        get_user_stats(user)
+        Post.objects.create(text='Пост', author=user)
+        UserStats.objects.filter(user=user).update(followers_count=42)
+        response = client.get(f'/{user.username}/')
+        assert response.context['countfollower'] == 42
+        assert response.context['count'] == 1
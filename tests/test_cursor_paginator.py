@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+from posts.paginators import CursorPage, CursorPaginator
+
+
+@pytest.fixture
+def many_posts(user):
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=user) for i in range(25)
+    )
+    return list(Post.objects.order_by('-pub_date', '-id'))
+
+
+class TestCursorPaginator:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_walk_forward_and_back(self, many_posts):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.get_page()
+        assert not first.has_previous()
+        assert first.has_next()
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+        assert not third.has_next(), 'Проверьте, что последняя страница не имеет следующей'
+        walked = list(first) + list(second) + list(third)
+        assert walked == many_posts, 'Проверьте, что курсор обходит ленту без пропусков и повторов'
+
+        back = paginator.get_page(third.previous_cursor)
+        assert list(back) == list(second)
+        assert back.has_previous() and back.has_next()
+        back = paginator.get_page(back.previous_cursor)
+        assert list(back) == list(first)
+        assert not back.has_previous()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_same_pub_date_is_ordered_by_id(self, many_posts):
+        Post.objects.update(pub_date=many_posts[0].pub_date)
+        paginator = CursorPaginator(Post.objects.all(), 7)
+        page = paginator.get_page()
+        ids = [post.id for post in page]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            ids.extend(post.id for post in page)
+        assert ids == sorted(ids, reverse=True)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalid_cursor_returns_first_page(self, many_posts):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page('не-курсор')
+        assert list(page) == many_posts[:10]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cursor_page_does_not_count(self, many_posts):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.get_page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            paginator.get_page(cursor)
+        assert len(queries) == 1
+        sql = queries[0]['sql'].upper()
+        assert 'COUNT(' not in sql and 'OFFSET' not in sql
+
+
+class TestCursorPaginatorView:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_next_link_uses_cursor(self, client, many_posts):
+        response = client.get('/')
+        next_cursor = response.context['page'].next_cursor
+        assert f'?cursor={next_cursor}' in response.content.decode(), \
+            'Проверьте, что ссылка на следующую страницу `/` ведет на курсор'
+
+        response = client.get(f'/?cursor={next_cursor}')
+        page = response.context['page']
+        assert type(page) == CursorPage
+        assert list(page) == many_posts[10:20]
+        assert f'?cursor={page.previous_cursor}' in response.content.decode()
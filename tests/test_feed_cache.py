@@ -0,0 +1,101 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.cache import feed_cache
+from posts.follows import follow_feed_version
+from posts.models import Comment, Follow, Group, Post
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+class TestFeedCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_feed_is_not_index(self, user_client, post):
+        user_client.get('/')
+        response = user_client.get('/follow/')
+        assert post.text not in response.content.decode(), \
+            'Проверьте, что `/follow/` и `/` не делят один ключ кэша'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pages_are_cached_separately(self, client, user):
+        Post.objects.bulk_create(
+            Post(text=f'Пост номер {i}', author=user) for i in range(12)
+        )
+        first = client.get('/').content.decode()
+        second = client.get('/?page=2').content.decode()
+        assert 'Пост номер 0' in second and 'Пост номер 0' not in first
+
+    @pytest.mark.django_db(transaction=True)
+    def test_writes_invalidate_cached_pages(self, client, user, post_with_group):
+        url = f'/group/{post_with_group.group.slug}/'
+        client.get(url)
+        client.get(f'/{user.username}/')
+
+        Comment.objects.create(post=post_with_group, author=user, text='Коммент')
+        assert 'Комментариев: 1' in client.get(url).content.decode()
+        assert 'Комментариев: 1' in client.get(f'/{user.username}/').content.decode()
+
+        other = Group.objects.create(title='Другая', slug='other')
+        client.get('/group/other/')
+        post_with_group.group = other
+        post_with_group.save()
+        assert post_with_group.text not in client.get(url).content.decode(), \
+            'Проверьте, что при смене группы сбрасывается кэш старой группы'
+        assert post_with_group.text in client.get('/group/other/').content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_feed_without_fan_out(self, user_client, user, post):
+        reader = get_user_model().objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=user)
+        user_client.force_login(reader)
+        assert post.text in user_client.get('/follow/').content.decode()
+
+        keys = []
+        set_many = feed_cache().set_many
+
+        def spy(data, *args, **kwargs):
+            keys.extend(data)
+            return set_many(data, *args, **kwargs)
+        feed_cache().set_many = spy
+        try:
+            Comment.objects.create(post=post, author=user, text='Коммент')
+        finally:
+            del feed_cache().set_many
+        assert not any(f'follow:{reader.pk}' in key for key in keys), \
+            'Проверьте, что запись не обходит ленты подписчиков'
+        Post.objects.create(text='Новый пост автора', author=user)
+        assert 'Новый пост автора' in \
+            user_client.get('/follow/').content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_feed_version_is_constant(self, user):
+        authors = [
+            get_user_model().objects.create(username=f'author{i}')
+            for i in range(30)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author) for author in authors
+        )
+        calls = []
+        get_many = feed_cache().get_many
+
+        def spy(keys, *args, **kwargs):
+            calls.append(list(keys))
+            return get_many(keys, *args, **kwargs)
+        feed_cache().get_many = spy
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                version = follow_feed_version(user.pk)
+        finally:
+            del feed_cache().get_many
+        assert len(captured) == 1 and sum(map(len, calls)) == 1, \
+            'Проверьте, что версия ленты подписок не зависит от числа авторов'
+        Post.objects.create(text='Новый пост', author=authors[0])
+        assert follow_feed_version(user.pk) != version
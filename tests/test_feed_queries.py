@@ -0,0 +1,52 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from posts.models import Comment, Follow, Post
+from yatube.instrumentation import RequestStats, record_queries
+
+FEED_URLS = (
+    '/',
+    '/group/test-link/',
+    '/FeedAuthor/',
+    '/follow/',
+)
+# Сессия, пользователь, COUNT пагинатора, страница постов, данные вью.
+QUERY_BUDGET = 10
+
+
+def make_feed(user, group, count):
+    author = get_user_model().objects.create_user(username='FeedAuthor')
+    Follow.objects.create(user=user, author=author)
+    for i in range(count):
+        post = Post.objects.create(
+            text=f'Пост ленты {i}', author=author, group=group
+        )
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+
+
+def count_queries(client, url):
+    cache.clear()
+    # Как в posts.benchmark: CaptureQueriesContext не видит пул
+    # posts.concurrent
+    with record_queries(RequestStats()) as stats:
+        response = client.get(url)
+    assert response.status_code == 200
+    return stats.query_count
+
+
+class TestFeedQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('url', FEED_URLS)
+    def test_feed_query_count_does_not_grow(self, user_client, user, group, url):
+        make_feed(user, group, 2)
+        small = count_queries(user_client, url)
+        Post.objects.all().delete()
+        get_user_model().objects.filter(username='FeedAuthor').delete()
+        make_feed(user, group, 10)
+        large = count_queries(user_client, url)
+        assert small == large, \
+            f'Проверьте, что число запросов на странице `{url}` не зависит от числа постов'
+        assert large <= QUERY_BUDGET, \
+            f'Страница `{url}` делает {large} запросов, бюджет {QUERY_BUDGET}'
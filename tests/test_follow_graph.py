@@ -0,0 +1,128 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.authors import author_summary
+from posts.counters import get_user_stats
+from posts.follows import (follow, followed_among, follower_ids,
+                           following_ids, unfollow)
+from posts.models import Follow, Post, TimelineEntry
+
+
+@pytest.fixture
+def authors():
+    User = get_user_model()
+    authors = [User.objects.create_user(username=f'GraphAuthor{i}') for i in range(5)]
+    for author in authors:
+        Post.objects.create(text='Пост', author=author)
+        get_user_stats(author)
+    return authors
+
+
+class TestFollowGraph:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_batch_follow_and_unfollow(self, user, authors):
+        get_user_stats(user)
+        ids = [author.pk for author in authors]
+        assert follow(user.pk, ids[:3] + [user.pk, 0]) == set(ids[:3]), \
+            'Проверьте, что нельзя подписаться на себя и на несуществующих'
+        assert follow(user.pk, ids[:4]) == {ids[3]}, \
+            'Проверьте, что повторная подписка не создает дубликаты'
+        assert Follow.objects.filter(user=user).count() == 4
+        assert get_user_stats(user).following_count == 4
+        assert get_user_stats(authors[0]).followers_count == 1
+        assert TimelineEntry.objects.filter(user=user).count() == 4, \
+            'Проверьте, что пакетная подписка заполняет ленту'
+        assert following_ids(user.pk) == set(ids[:4])
+        assert follower_ids(ids[0]) == {user.pk}
+
+        assert unfollow(user.pk, ids[:2]) == set(ids[:2])
+        assert Follow.objects.filter(user=user).count() == 2
+        assert get_user_stats(user).following_count == 2
+        assert get_user_stats(authors[0]).followers_count == 0
+        assert TimelineEntry.objects.filter(user=user).count() == 2
+        assert following_ids(user.pk) == set(ids[2:4]), \
+            'Проверьте, что отписка сбрасывает кэш графа'
+        assert follower_ids(ids[0]) == set()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_batch_size_does_not_add_queries(self, user, authors):
+        ids = [author.pk for author in authors]
+        with CaptureQueriesContext(connection) as one:
+            follow(user.pk, ids[:1])
+        with CaptureQueriesContext(connection) as many:
+            follow(user.pk, ids[1:])
+        assert len(many) == len(one), \
+            'Проверьте, что пакетная подписка не делает запрос на автора'
+        with CaptureQueriesContext(connection) as one:
+            unfollow(user.pk, ids[:1])
+        with CaptureQueriesContext(connection) as many:
+            unfollow(user.pk, ids[1:])
+        assert len(many) == len(one)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_concurrent_follow_is_counted_once(self, user, authors):
+        author = authors[0]
+        get_user_stats(user)
+        get_user_stats(author)
+        inserted = []
+
+        def concurrent_follow(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            # Параллельная подписка вставляет строку сразу после того,
+            # как эта проверила, на кого пользователь уже подписан
+            if sql.startswith('SELECT') and 'posts_follow' in sql \
+                    and not inserted:
+                inserted.append(True)
+                Follow.objects.bulk_create([Follow(user=user, author=author)])
+            return result
+        with connection.execute_wrapper(concurrent_follow):
+            followed = follow(user.pk, [author.pk])
+        assert inserted and followed == {author.pk}
+        assert get_user_stats(user).following_count == 1, \
+            'Проверьте, что счетчики сходятся со строками Follow'
+        assert get_user_stats(author).followers_count == 1
+
+        assert unfollow(user.pk, [author.pk]) == {author.pk}
+        assert unfollow(user.pk, [author.pk]) == set()
+        assert get_user_stats(user).following_count == 0
+        assert get_user_stats(author).followers_count == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_followed_among_is_constant(self, user, authors):
+        ids = [author.pk for author in authors]
+        Follow.objects.create(user=user, author=authors[1])
+        following_ids(user.pk)
+        with CaptureQueriesContext(connection) as captured:
+            assert followed_among(user, ids) == {ids[1]}
+        assert len(captured) == 0, \
+            'Проверьте, что состояние подписки на N авторов берется из кэша'
+
+        Follow.objects.create(user=user, author=authors[2])
+        assert followed_among(user, ids) == {ids[1], ids[2]}, \
+            'Проверьте, что подписка через ORM сбрасывает кэш графа'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_warm_profile_header(self, user, authors):
+        author = authors[0]
+        follow(user.pk, [author.pk])
+        for _ in range(3):
+            author_summary(author.username, user)
+        with CaptureQueriesContext(connection) as captured:
+            summary, following = author_summary(author.username, user)
+        assert following is True
+        assert len(captured) == 0, \
+            'Проверьте, что шапка профиля для читателя не стоит запросов'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_view_redirects(self, user_client, authors):
+        author = authors[0]
+        response = user_client.get(f'/{author.username}/follow/')
+        assert response.status_code == 302
+        assert response.url == f'/{author.username}/'
+        assert user_client.get(response.url).context['following'] is True
+        response = user_client.get(f'/{author.username}/unfollow/')
+        assert response.url == f'/{author.username}/'
+        assert user_client.get(response.url).context['following'] is False
@@ -3,6 +3,7 @@ import tempfile
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
@@ -149,9 +150,19 @@ class CheckPostForm(TestCase):
         self.assertEqual(response.status_code, 200)
 
     def test_cache_index_page(self):
-        """ Проверка кэширования главной страницы """
+        """ Главная страница кэшируется и сразу показывает новые записи """
+        cache.clear()
         self.html_index_0 = self.guest_client.get(INDEX_URL)
 
+        # Запись в обход сигналов не сбрасывает кэш
+        Post.objects.filter(id=1).update(text=POST_EDIT_TEXT)
+        self.html_index_1 = self.guest_client.get(INDEX_URL)
+        self.assertHTMLEqual(
+            str(self.html_index_0.content),
+            str(self.html_index_1.content),
+            ERROR_CACHE
+            )
+
         form_data = {
             'text': POST_TEXT_2,
         }
@@ -162,12 +173,9 @@ class CheckPostForm(TestCase):
             follow=True
         )
 
-        self.html_index_1 = self.guest_client.get(INDEX_URL)
-        self.assertHTMLEqual(
-            str(self.html_index_0.content),
-            str(self.html_index_1.content),
-            ERROR_CACHE
-            )
+        self.html_index_2 = self.guest_client.get(INDEX_URL)
+        self.assertIn(POST_TEXT_2, self.html_index_2.content.decode())
+        self.assertIn(POST_EDIT_TEXT, self.html_index_2.content.decode())
 
 
     def test_unfollowing(self):
@@ -186,7 +194,7 @@ class CheckPostForm(TestCase):
         follow_list_count = Follow.objects.filter(user=self.user).count()
         self.assertEqual(follow_list_count, 1)
         self.assertEqual(str(follow_list[0].author), USERNAME)
-        self.assertEqual(response.status_code, 200)        
+        self.assertRedirects(response, reverse('profile', kwargs={'username': USERNAME}))        
         response = self.authorized_client.post(
             reverse('profile_unfollow',
                 kwargs={
@@ -196,4 +204,4 @@ class CheckPostForm(TestCase):
         )
         follow_list_count = Follow.objects.filter(user=self.user).count()
         self.assertEqual(follow_list_count, 0)
-        self.assertEqual(response.status_code, 200)
+        self.assertRedirects(response, reverse('profile', kwargs={'username': USERNAME}))
@@ -0,0 +1,46 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from posts.models import Post
+from yatube.instrumentation import RequestStats, record_queries
+
+QUERY_BUDGET = 6
+SIZE_BUDGET = 64 * 1024
+
+
+def fill_group(group, total):
+    User = get_user_model()
+    authors = [
+        User.objects.get_or_create(username=f'GroupAuthor{i}')[0]
+        for i in range(5)
+    ]
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=authors[i % 5], group=group)
+        for i in range(total - group.posts.count())
+    )
+    # bulk_create не меняет версии лент, кэш страниц сбрасываем сами
+    cache.clear()
+
+
+class TestGroupFeed:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_group_page_budget(self, client, group):
+        results = []
+        for total in (15, 400):
+            fill_group(group, total)
+            # Считаются и запросы пула posts.concurrent
+            with record_queries(RequestStats()) as stats:
+                response = client.get(f'/group/{group.slug}/')
+            assert response.status_code == 200
+            assert 'posts' not in response.context, \
+                'Проверьте, что в шаблон группы не передается вся лента'
+            assert len(response.context['page']) == 10
+            results.append((stats.query_count, len(response.content)))
+        (small_queries, small_size), (queries, size) = results
+        assert queries <= QUERY_BUDGET and queries == small_queries, \
+            'Проверьте, что число запросов страницы группы не растет с лентой'
+        assert size <= SIZE_BUDGET and size - small_size < 1024, \
+            'Проверьте, что страница группы выводит только текущую страницу'
+        assert response.content.decode().count('Автор: ') == 10
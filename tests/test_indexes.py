@@ -0,0 +1,80 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from posts.feeds import feed_posts
+from posts.models import Comment, Follow
+from posts.paginators import CursorPaginator
+from posts.timeline import get_timeline_backend
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Планы запросов проверяются через SQLite EXPLAIN QUERY PLAN',
+)
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+
+def assert_uses_index(queryset, index_name):
+    plan = query_plan(queryset)
+    assert index_name in plan, f'Запрос не использует индекс `{index_name}`: {plan}'
+    assert 'TEMP B-TREE' not in plan, f'Запрос сортирует без индекса: {plan}'
+
+
+class TestFeedIndexes:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feeds_use_indexes(self, user, post_with_group):
+        page = slice(0, 11)
+        assert_uses_index(
+            feed_posts().order_by('-pub_date', '-id')[page],
+            'post_pub_date_idx'
+        )
+        assert_uses_index(
+            feed_posts(group=post_with_group.group).order_by('-pub_date', '-id')[page],
+            'post_group_pub_date_idx'
+        )
+        assert_uses_index(
+            feed_posts(author=user).order_by('-pub_date', '-id')[page],
+            'post_author_pub_date_idx'
+        )
+        assert_uses_index(
+            Comment.objects.filter(post=post_with_group).order_by('-created', '-id')[page],
+            'comment_post_created_idx'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_feed_uses_timeline_index(self, user):
+        timeline = get_timeline_backend()
+        queryset = timeline.feed(user, feed_posts())
+        assert_uses_index(
+            queryset.order_by(*timeline.ordering)[:11],
+            'timeline_user_pub_date_idx'
+        )
+        paginator = CursorPaginator(queryset, 10, timeline.ordering, timeline.keys)
+        seek = paginator._seek([timezone.now(), 1], forward=True)
+        assert_uses_index(
+            queryset.order_by(*timeline.ordering).filter(seek)[:11],
+            'timeline_user_pub_date_idx'
+        )
+
+
+class TestFollowConstraints:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_is_unique(self, user, django_user_model):
+        author = django_user_model.objects.create_user(username='IndexAuthor')
+        Follow.objects.create(user=user, author=author)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_self_follow_is_rejected(self, user):
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=user, author=user)
+        assert not Follow.objects.exists()
@@ -0,0 +1,63 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+
+from posts.models import Post
+from yatube import instrumentation
+from yatube.instrumentation import RequestStats, aggregate
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.MIDDLEWARE = [
+        'yatube.instrumentation.InstrumentationMiddleware',
+    ] + settings.MIDDLEWARE
+    templates = [dict(settings.TEMPLATES[0])]
+    templates[0]['BACKEND'] = 'yatube.instrumentation.TimedDjangoTemplates'
+    settings.TEMPLATES = templates
+    aggregate.clear()
+    yield
+    aggregate.clear()
+
+
+class TestInstrumentation:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_duplicates(self, post):
+        stats = RequestStats()
+        with connection.execute_wrapper(stats.record_query):
+            for _ in range(3):
+                Post.objects.filter(pk=post.pk).first()
+            Post.objects.count()
+        assert stats.query_count == 4
+        assert list(stats.duplicates().values()) == [3], \
+            'Проверьте, что одинаковый SQL с разными параметрами ' \
+            'считается повтором'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_server_timing(self, instrumented, post):
+        response = Client().get('/')
+        assert response.status_code == 200
+        timing = response['Server-Timing']
+        assert 'db;dur=' in timing and 'app;dur=' in timing, \
+            'Проверьте, что ответ содержит заголовок Server-Timing'
+        [sample] = aggregate.snapshot()['index']['samples']
+        total, sql, template, queries = sample
+        assert queries > 0
+        assert 0 < template <= total, \
+            'Проверьте, что время шаблона учитывается отдельно'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_report(self, instrumented, post, capsys, monkeypatch):
+        client = Client()
+        for _ in range(3):
+            client.get(f'/{post.author.username}/{post.pk}/')
+        monkeypatch.setattr(instrumentation, 'FLUSH_INTERVAL', -1)
+        client.get('/')
+        assert len(instrumentation.collect_snapshots()) == 1, \
+            'Проверьте, что выборка сбрасывается в общий кэш'
+        call_command('request_stats')
+        output = capsys.readouterr().out
+        assert 'post: 3 запросов' in output
+        assert 'index: 1 запросов' in output
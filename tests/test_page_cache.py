@@ -0,0 +1,102 @@
+import time
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import parse_http_date
+
+from posts.models import Follow, Post
+
+
+# Страница с оригиналом вместо миниатюры не кэшируется,
+# поэтому посты здесь без картинок
+@pytest.fixture
+def post(user):
+    return Post.objects.create(text='Тестовый пост 1', author=user)
+
+
+@pytest.fixture
+def post_with_group(user, group):
+    return Post.objects.create(text='Тестовый пост 2', author=user, group=group)
+
+
+class TestAnonymousPageCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_validators_are_sent(self, client, post):
+        response = client.get('/')
+        assert response.status_code == 200
+        assert response.has_header('ETag'), 'Проверьте, что главная отдает ETag'
+        assert response.has_header('Last-Modified'), \
+            'Проверьте, что главная отдает Last-Modified'
+        assert 'Cookie' in response['Vary']
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('url', ('/', '/group/test-link/', '/TestUser/'))
+    def test_not_modified(self, client, post_with_group, url):
+        etag = client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, \
+            f'Проверьте, что `{url}` отвечает 304 на совпавший If-None-Match'
+        assert not response.content
+        assert len(queries) <= 1, 'Проверьте, что для 304 вью не вызывается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_not_modified_since(self, client, post):
+        url = f'/{post.author.username}/{post.pk}/'
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_last_modified_from_versions(self, client, post):
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/')
+        assert not any('MAX(' in query['sql'] for query in queries), \
+            'Проверьте, что Last-Modified берется из версий кэша, а не из базы'
+        with mock.patch('time.time', return_value=time.time() + 60):
+            Post.objects.create(text='Новый пост', author=post.author)
+        response = client.get('/')
+        assert parse_http_date(response['Last-Modified']) > time.time() + 30
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cached_page_is_served_without_view(self, client, post):
+        first = client.get('/')
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get('/')
+        assert second.content == first.content
+        assert len(queries) == 0, 'Проверьте, что повторный запрос идет из кэша'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_writes_change_etag(self, client, user, post):
+        etag = client.get('/')['ETag']
+        Post.objects.create(text='Новый пост', author=user)
+        response = client.get('/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert 'Новый пост' in response.content.decode()
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_changes_profile(self, client, user, django_user_model):
+        author = django_user_model.objects.create_user(username='Author')
+        client.get('/Author/')
+        Follow.objects.create(user=user, author=author)
+        response = client.get('/Author/')
+        assert response.context is not None, \
+            'Проверьте, что подписка сбрасывает кэш профиля'
+        assert response.context['countfollower'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_logged_in_users_bypass_cache(self, client, user_client, post):
+        client.get('/')
+        response = user_client.get('/')
+        assert response.context is not None, \
+            'Проверьте, что авторизованным страница рендерится заново'
+        assert not response.has_header('ETag')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_missing_pages_are_not_cached(self, client):
+        assert client.get('/group/missing/').status_code == 404
+        assert client.get('/Nobody/').status_code == 404
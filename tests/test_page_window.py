@@ -0,0 +1,80 @@
+import re
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+from posts.paginators import page_window
+
+
+class TestPageWindow:
+
+    def test_window(self):
+        assert page_window(1, 1) == [1]
+        assert page_window(3, 7) == [1, 2, 3, 4, 5, 6, 7]
+        assert page_window(1, 50000) == [1, 2, 3, None, 50000]
+        assert page_window(25000, 50000) == [
+            1, None, 24998, 24999, 25000, 25001, 25002, None, 50000
+        ]
+        assert page_window(50000, 50000) == [1, None, 49998, 49999, 50000]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_response_size_is_constant(self, client, user):
+        sizes = []
+        for total in (100, 3000):
+            Post.objects.bulk_create(
+                Post(text='Пост', author=user)
+                for _ in range(total - Post.objects.count())
+            )
+            # bulk_create не меняет версии лент, кэш страниц сбрасываем сами
+            cache.clear()
+            response = client.get('/?page=5')
+            assert response.status_code == 200
+            sizes.append(len(response.content))
+            assert response.content.decode().count('class="page-link"') <= 12, \
+                'Проверьте, что паджинатор выводит только окно номеров страниц'
+        assert abs(sizes[1] - sizes[0]) < 100, \
+            'Проверьте, что размер страницы не растет с числом страниц'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_last_page_link_is_cursor(self, client, user):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=user) for i in range(35)
+        )
+        content = client.get('/').content.decode()
+        assert '?page=4' not in content, \
+            'Проверьте, что последняя страница открывается курсором, без OFFSET'
+        cursor = re.search(r'\?cursor=([\w-]+)">4<', content).group(1)
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get('/', {'cursor': cursor})
+        assert not any('OFFSET' in query['sql'] for query in captured)
+        page = response.context['page']
+        newest = list(Post.objects.order_by('-pub_date', '-id'))
+        assert list(page) == newest[30:], \
+            'Проверьте, что по ссылке на последнюю страницу видна она сама'
+        assert page.has_previous() and not page.has_next()
+        previous = client.get('/', {'cursor': page.previous_cursor})
+        assert list(previous.context['page']) == newest[20:30]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_first_page_without_count_and_offset(self, client, user_client,
+                                                 user):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=user) for i in range(35)
+        )
+        client.get('/')
+        # Фрагмент у пользователя свой, а число записей ленты общее
+        with CaptureQueriesContext(connection) as captured:
+            response = user_client.get('/')
+        sql = ' '.join(query['sql'] for query in captured)
+        assert 'COUNT(' not in sql and 'OFFSET' not in sql, \
+            'Проверьте, что первая страница не считает записи каждый раз'
+        content = response.content.decode()
+        assert '?page=2' not in content and '?page=3' not in content, \
+            'Проверьте, что ссылки окна ведут на курсоры, без OFFSET'
+        newest = list(Post.objects.order_by('-pub_date', '-id'))
+        cursor = re.search(r'\?cursor=([\w-]+)">3<', content).group(1)
+        response = client.get('/', {'cursor': cursor})
+        assert list(response.context['page']) == newest[20:30]
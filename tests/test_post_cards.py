@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.template import engines
+
+from posts.cards import card_key, render_cards
+from posts.feeds import feed_posts
+from posts.models import Comment, Post
+
+
+def render_post(post):
+    return f'<p>{post.text}</p>'
+
+
+@pytest.fixture
+def posts(user, group):
+    for i in range(3):
+        Post.objects.create(text=f'Карточка {i}', author=user, group=group)
+    return list(feed_posts().order_by('pk'))
+
+
+class TestPostCards:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_page_is_one_get_many(self, posts):
+        anonymous = AnonymousUser()
+        render = mock.Mock(side_effect=render_post)
+        assert render_cards(posts, anonymous, render)[0] == '<p>Карточка 0</p>'
+        assert render.call_count == 3
+        cache = caches['default']
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            render_cards(posts, anonymous, render)
+        assert render.call_count == 3, \
+            'Проверьте, что готовые карточки не рендерятся повторно'
+        assert get_many.call_count == 1, \
+            'Проверьте, что карточки страницы читаются одним get_many'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_key_changes(self, posts, user):
+        post = posts[0]
+        anonymous = AnonymousUser()
+        key = card_key(post, anonymous)
+        assert card_key(post, user) != key, \
+            'Проверьте, что автор и читатель видят разные карточки'
+
+        Comment.objects.create(post=post, author=user, text='Новый')
+        post = feed_posts().get(pk=post.pk)
+        assert card_key(post, anonymous) != key, \
+            'Проверьте, что комментарий меняет версию карточки'
+        key = card_key(post, anonymous)
+        post.text = 'Правка'
+        post.save()
+        assert card_key(post, anonymous) != key, \
+            'Проверьте, что правка поста меняет версию карточки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fallback_is_not_cached(self, post):
+        post = feed_posts().get(pk=post.pk)
+        reader = get_user_model().objects.create_user(username='CardReader')
+        html = engines['django'].from_string(
+            '{% load post_card %}{% post_cards posts %}'
+        ).render({'posts': [post], 'user': reader})
+        assert post.text in html
+        assert caches['default'].get(card_key(post, reader)) is None, \
+            'Проверьте, что карточка с оригиналом вместо миниатюры не кэшируется'
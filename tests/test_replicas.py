@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, router, transaction
+
+from posts.cache import bump_versions, feed_cache, get_versions
+from posts.concurrent import fetch
+from posts.models import Post
+from yatube.routers import STICKY_COOKIE, replica_may_lag, replica_reads
+
+REPLICA = 'replica1'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """Копия тестовой базы в отдельном файле SQLite."""
+    connections.databases[REPLICA] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    settings.VIEW_FETCH_WORKERS = 0
+    call_command('sync_replicas')
+    yield REPLICA
+    connections[REPLICA].close()
+    if hasattr(connections._connections, REPLICA):
+        delattr(connections._connections, REPLICA)
+    del connections.databases[REPLICA]
+
+
+class TestReplicaRouter:
+
+    def test_routing(self, settings):
+        settings.DATABASE_REPLICAS = [REPLICA]
+        assert router.db_for_read(Post) == 'default', \
+            'Проверьте, что без replica_reads чтение идет в основную базу'
+        with replica_reads():
+            assert router.db_for_read(Post) == REPLICA
+            assert router.db_for_write(Post) == 'default', \
+                'Проверьте, что запись всегда идет в основную базу'
+        assert router.allow_migrate('default', 'posts')
+        assert not router.allow_migrate(REPLICA, 'posts')
+
+    def test_no_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        with replica_reads():
+            assert router.db_for_read(Post) == 'default'
+        with pytest.raises(CommandError):
+            call_command('sync_replicas')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_transaction_reads_primary(self, settings):
+        settings.DATABASE_REPLICAS = [REPLICA]
+        with replica_reads(), transaction.atomic():
+            assert router.db_for_read(Post) == 'default', \
+                'Проверьте, что внутри транзакции чтение идет в основную базу'
+
+    def test_fresh_version_marks_lag(self, settings):
+        settings.REPLICA_LAG = 5
+        bump_versions('lag-test')
+        get_versions('lag-test')
+        assert not replica_may_lag(), \
+            'Проверьте, что чтение из основной базы не считается отставшим'
+        with replica_reads():
+            get_versions('lag-test')
+            assert replica_may_lag(), \
+                'Проверьте, что свежая версия ленты на реплике ' \
+                'помечает запрос отставшим'
+        assert not replica_may_lag()
+        settings.REPLICA_LAG = 0
+        with replica_reads():
+            get_versions('lag-test')
+            assert not replica_may_lag()
+
+    def test_fetch_pool_reports_lag(self, settings):
+        settings.REPLICA_LAG = 5
+        settings.VIEW_FETCH_WORKERS = 2
+        bump_versions('lag-test')
+        with replica_reads():
+            fetch(a=lambda: None, b=lambda: get_versions('lag-test'))
+            assert replica_may_lag(), \
+                'Проверьте, что отставание, замеченное в пуле, ' \
+                'видно потоку запроса'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fetch_pool_inherits_routing(self, settings):
+        settings.DATABASE_REPLICAS = [REPLICA]
+
+        def route():
+            return threading.current_thread().name, router.db_for_read(Post)
+        with replica_reads():
+            routes = fetch(a=route, b=route)
+        assert routes['b'][0].startswith('fetch')
+        assert {db for name, db in routes.values()} == {REPLICA}, \
+            'Проверьте, что потоки posts.concurrent читают с реплики'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaViews:
+
+    def test_feed_reads_replica(self, client, user, replica):
+        Post.objects.create(text='Только в основной базе', author=user)
+        response = client.get('/')
+        assert response.status_code == 200
+        assert 'Только в основной базе' not in response.content.decode(), \
+            'Проверьте, что главная страница читает с реплики'
+
+    def test_lagging_page_not_cached(self, client, user, replica):
+        Post.objects.create(text='Свежая запись', author=user)
+        response = client.get('/')
+        assert 'Свежая запись' not in response.content.decode()
+        call_command('sync_replicas')
+        response = client.get('/')
+        assert 'Свежая запись' in response.content.decode(), \
+            'Проверьте, что страница с отстающей реплики не кэшируется'
+
+    def test_unrelated_write_keeps_replica(self, client, user, replica):
+        # bulk_create без сигналов: версия главной не меняется
+        Post.objects.bulk_create([Post(text='Мимо реплики', author=user)])
+        bump_versions('unrelated')
+        response = client.get('/')
+        assert 'Мимо реплики' not in response.content.decode(), \
+            'Проверьте, что запись в другую ленту не уводит чтение ' \
+            'в основную базу'
+
+    def test_sticky_after_post(self, user_client, client, replica):
+        response = user_client.post('/new', data={'text': 'Мой новый пост'})
+        assert response.status_code == 302
+        assert STICKY_COOKIE in response.cookies, \
+            'Проверьте, что после записи ставится cookie основной базы'
+        response = user_client.get('/')
+        assert 'Мой новый пост' in response.content.decode(), \
+            'Проверьте, что автор сразу видит свою запись'
+        user_client.cookies.pop(STICKY_COOKIE)
+        # Лента с прошлого ответа лежит в кэше
+        feed_cache().clear()
+        response = user_client.get('/')
+        assert 'Мой новый пост' not in response.content.decode()
+
+    def test_sync_replicas(self, client, user, replica):
+        Post.objects.create(text='Реплицированный пост', author=user)
+        call_command('sync_replicas')
+        response = client.get('/')
+        assert 'Реплицированный пост' in response.content.decode()
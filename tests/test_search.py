@@ -0,0 +1,116 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections
+
+from posts import search
+from posts.models import Comment, Post
+from posts.search import get_search_backend, match_expression
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='поиск работает на SQLite FTS5'
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_index(transactional_db):
+    # flush между тестами не знает о виртуальных таблицах FTS5
+    get_search_backend().rebuild()
+
+
+def found(client, query, **params):
+    response = client.get('/search/', {'q': query, **params})
+    assert response.status_code == 200
+    return [post.text for post in response.context['results']]
+
+
+class TestSearch:
+
+    def test_match_expression_drops_operators(self):
+        assert match_expression('Кролики OR "мех" NEAR(') == \
+            '"кролики"* "or"* "мех"* "near"*'
+        assert match_expression('  ') == ''
+
+    @pytest.mark.django_db(transaction=True)
+    def test_posts_and_comments_are_found(self, client, user):
+        rabbits = Post.objects.create(text='Кролики это ценный мех', author=user)
+        other = Post.objects.create(text='Совсем про другое', author=user)
+        Comment.objects.create(post=other, author=user, text='а кролики тут при чем')
+        Post.objects.create(text='Ничего общего', author=user)
+        assert found(client, 'кролик') == [rabbits.text, other.text], \
+            'Проверьте, что совпадение в посте выше совпадения в комментарии'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_follows_edits_and_deletes(self, client, user):
+        post = Post.objects.create(text='Старый текст', author=user)
+        post.text = 'Новый текст'
+        post.save()
+        assert found(client, 'старый') == []
+        assert found(client, 'новый') == ['Новый текст']
+        post.delete()
+        assert found(client, 'новый') == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_filters(self, client, user, group, django_user_model):
+        other = django_user_model.objects.create_user(username='Other')
+        Post.objects.create(text='Пост в группе', author=user, group=group)
+        Post.objects.create(text='Пост без группы', author=user)
+        Post.objects.create(text='Пост другого автора', author=other, group=group)
+        assert found(client, 'пост', group=group.slug) == \
+            ['Пост другого автора', 'Пост в группе']
+        assert found(client, 'пост', group=group.slug, author='Other') == \
+            ['Пост другого автора']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pages(self, client, user):
+        for i in range(12):
+            Post.objects.create(text=f'Заметка {i}', author=user)
+        response = client.get('/search/', {'q': 'заметка'})
+        assert len(response.context['results']) == 10
+        assert response.context['has_next']
+        response = client.get('/search/', {'q': 'заметка', 'page': 2})
+        assert len(response.context['results']) == 2
+        assert not response.context['has_next']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rebuild_command(self, client, user):
+        Post.objects.bulk_create([Post(text='Без сигналов', author=user)])
+        assert found(client, 'сигналов') == []
+        call_command('rebuild_search_index')
+        assert found(client, 'сигналов') == ['Без сигналов'], \
+            'Проверьте, что `rebuild_search_index` индексирует все посты'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search_uses_index(self, user):
+        Post.objects.create(text='Кролики', author=user)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN SELECT rowid FROM posts_post_search '
+                'WHERE posts_post_search MATCH %s', ['"кролики"*']
+            )
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'VIRTUAL TABLE INDEX' in plan
+        assert get_search_backend().search('кролики', 10)
+
+
+@pytest.fixture
+def other_database(monkeypatch):
+    # Бэкенд выбирается один раз, по базе на момент первого обращения
+    monkeypatch.setattr(search, '_backend', None)
+    with monkeypatch.context() as patch:
+        patch.setattr(connections['default'], 'vendor', 'postgresql')
+        return get_search_backend()
+
+
+class TestDatabaseSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_without_fts_tables(self, client, user, other_database):
+        assert isinstance(other_database, search.DatabaseSearchBackend), \
+            'Проверьте, что без SQLite поиск не обращается к таблицам FTS5'
+        post = Post.objects.create(text='кролики и мех', author=user)
+        other = Post.objects.create(text='про другое', author=user)
+        Comment.objects.create(post=other, author=user, text='где кролики')
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.POST_TABLE}')
+            assert cursor.fetchone()[0] == 0
+        assert found(client, 'кролик') == [other.text, post.text]
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from posts import cache as feed_cache_module
+from yatube.cache_backends import SQLiteCache
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    return lambda: SQLiteCache(str(tmp_path / 'cache.sqlite3'), {})
+
+
+@pytest.fixture
+def feed_cache(shared_cache, monkeypatch):
+    backend = shared_cache()
+    monkeypatch.setattr(feed_cache_module, 'feed_cache', lambda: backend)
+    return backend
+
+
+class TestSQLiteCache:
+
+    def test_basic_operations(self, shared_cache):
+        cache = shared_cache()
+        cache.set('key', {'value': 1})
+        assert cache.get('key') == {'value': 1}
+        assert cache.add('key', 2) is False
+        assert cache.add('other', 2) is True
+        assert cache.get_many(['key', 'other', 'missing']) == {'key': {'value': 1}, 'other': 2}
+        assert cache.incr('other', 5) == 7
+        cache.delete('key')
+        assert cache.get('key', 'default') == 'default'
+        cache.clear()
+        assert cache.get('other') is None
+
+    def test_expired_values_are_gone(self, shared_cache):
+        cache = shared_cache()
+        cache.set('key', 1, timeout=0)
+        assert cache.get('key') is None
+        assert cache.add('key', 2) is True, 'Проверьте, что add перезаписывает истекший ключ'
+
+    def test_workers_share_one_store(self, shared_cache):
+        first, second = shared_cache(), shared_cache()
+        first.set('index_page', 'html')
+        assert second.get('index_page') == 'html', \
+            'Проверьте, что кэш общий для разных процессов'
+
+    def test_max_entries_are_culled(self, tmp_path):
+        cache = SQLiteCache(
+            str(tmp_path / 'small.sqlite3'),
+            {'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}}
+        )
+        cache.set_many({f'key{i}': i for i in range(100)})
+        for i in range(64):
+            cache.set(f'more{i}', i)
+        count = cache._connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        assert count < 164
+
+
+class TestStampedeProtection:
+
+    def test_cold_key_is_built_once(self, feed_cache):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return 'html'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    feed_cache_module.get_or_build('index_page', build, 60)
+                )
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ['html'] * 5
+        assert len(builds) == 1, 'Проверьте, что холодный ключ собирает один воркер'
+
+    def test_expired_key_serves_stale_while_locked(self, feed_cache):
+        feed_cache.set('index_page', ('old', 0.1, time.time() - 1), 60)
+        feed_cache.add(feed_cache_module.LOCK_KEY.format('index_page'), 1, 30)
+        value = feed_cache_module.get_or_build('index_page', lambda: 'new', 60)
+        assert value == 'old', 'Проверьте, что пока ключ пересобирают, отдается старое значение'
+
+    def test_early_expiry_rebuilds_before_deadline(self, feed_cache):
+        feed_cache.set('index_page', ('old', 10.0, time.time() + 5), 60)
+        value = feed_cache_module.get_or_build(
+            'index_page', lambda: 'new', 60, beta=1000
+        )
+        assert value == 'new'
+        fresh = feed_cache_module.get_or_build('index_page', lambda: 'newer', 60)
+        assert fresh == 'new'
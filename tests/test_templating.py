@@ -0,0 +1,56 @@
+import pytest
+from django.core.management import call_command
+from django.template import engines
+
+from posts.benchmark import render_benchmark
+from yatube.templating import precompile_templates, template_names
+
+
+class TestTemplating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_card_matches_include(self, user, post_with_group):
+        engine = engines['django']
+        context = {'posts': [post_with_group], 'user': user}
+        included = engine.from_string(
+            '{% for post in posts %}'
+            '{% include "post_item.html" with post=post %}{% endfor %}'
+        ).render(context)
+        card = engine.from_string(
+            '{% load post_card %}'
+            '{% for post in posts %}{% post_card post %}{% endfor %}'
+        ).render(context)
+        assert card == included, \
+            'Проверьте, что `post_card` рендерит ту же карточку поста'
+        assert 'Редактировать' in card
+
+    def test_precompile(self, settings):
+        settings.TEMPLATES = [dict(
+            settings.TEMPLATES[0],
+            OPTIONS=dict(settings.TEMPLATES[0]['OPTIONS'], loaders=[(
+                'django.template.loaders.cached.Loader',
+                [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ],
+            )]),
+        )]
+        names = set(template_names(engines['django']))
+        assert 'post_item.html' in names
+        assert precompile_templates() == len(names)
+        loader = engines['django'].engine.template_loaders[0]
+        assert 'post_item.html' in {
+            template.origin.template_name
+            for template in loader.get_template_cache.values()
+            if hasattr(template, 'origin')
+        }, 'Проверьте, что шаблоны компилируются в кэш загрузчика'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_render_benchmark(self, post_with_group, capsys):
+        results = render_benchmark(sizes=(10, 50), repeats=2)
+        assert set(results) == {10, 50}
+        assert set(results[10]) == {
+            'include_p50_ms', 'post_card_p50_ms', 'post_cards_p50_ms'
+        }
+        call_command('benchmark_render', '--sizes', '10', '--repeats', '1')
+        assert '10 постов' in capsys.readouterr().out
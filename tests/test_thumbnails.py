@@ -0,0 +1,117 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+from posts.cache import feed_cache, get_or_build
+from posts.models import Post
+
+
+def image_file(name='image.png', size=(100, 60)):
+    file_obj = BytesIO()
+    Image.new('RGB', size, (255, 0, 0)).save(file_obj, 'png')
+    return ContentFile(file_obj.getvalue(), name)
+
+
+def thumbnail_of(post):
+    geometry, options = thumbnails.POST_IMAGE_VARIANTS[0]
+    name = default.backend._thumbnail_name(
+        ImageFile(post.image), geometry, dict(options)
+    )
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+# sorl-thumbnail 12.6 ресайзит через Image.ANTIALIAS, которого нет в Pillow 10+
+needs_resize = pytest.mark.skipif(
+    not hasattr(Image, 'ANTIALIAS'),
+    reason='установленный Pillow несовместим с sorl-thumbnail из requirements'
+)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+class TestThumbnails:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_new_post_saves_image(self, user_client):
+        user_client.post('/new', data={'text': 'С картинкой', 'image': image_file()})
+        post = Post.objects.get(text='С картинкой')
+        assert post.image.name.startswith('posts/'), \
+            'Проверьте, что `new_post` сохраняет загруженную картинку'
+
+    @needs_resize
+    @pytest.mark.django_db(transaction=True)
+    def test_new_post_builds_thumbnail(self, user_client):
+        user_client.post('/new', data={'text': 'С картинкой', 'image': image_file()})
+        post = Post.objects.get(text='С картинкой')
+        thumbnail = thumbnail_of(post)
+        assert thumbnail is not None, \
+            'Проверьте, что миниатюры собираются при сохранении поста'
+        response = user_client.get('/')
+        assert thumbnail.url in response.content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feed_serves_original_until_thumbnail_is_ready(self, client, user, monkeypatch):
+        scheduled = []
+        monkeypatch.setattr(
+            thumbnails.worker, 'schedule', lambda name, build: scheduled.append(name)
+        )
+        post = Post.objects.create(text='Пост', author=user)
+        post.image.save('image.png', image_file())
+        content = client.get('/').content.decode()
+        assert post.image.url in content, \
+            'Проверьте, что пока миниатюры нет, показывается оригинал'
+        assert scheduled, 'Проверьте, что сборка миниатюры уходит в очередь'
+        assert thumbnail_of(post) is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pages_with_original_are_not_cached(self, client, user, monkeypatch):
+        monkeypatch.setattr(thumbnails.worker, 'schedule', lambda name, build: None)
+        post = Post.objects.create(text='Пост', author=user)
+        post.image.save('image.png', image_file())
+        client.get('/')
+        response = client.get('/')
+        assert response.context is not None, \
+            'Проверьте, что страница с оригиналом не попадает в кэш страниц'
+        assert not response.has_header('ETag')
+
+    def test_fragments_with_original_are_not_cached(self):
+        def build():
+            # Как карточка поста внутри фрагмента ленты
+            with thumbnails.track_fallbacks() as fallbacks:
+                fallbacks.append('thumbnail.jpg')
+            return 'html'
+        assert get_or_build('fragment', build, 60) == 'html'
+        assert feed_cache().get('fragment') is None, \
+            'Проверьте, что фрагмент с оригиналом не попадает в кэш лент'
+        assert get_or_build('fragment', lambda: 'html', 60) == 'html'
+        assert feed_cache().get('fragment') is not None
+
+    @needs_resize
+    @pytest.mark.django_db(transaction=True)
+    def test_worker_builds_in_background(self, settings, user, monkeypatch):
+        monkeypatch.setattr(thumbnails, 'worker', thumbnails.ThumbnailWorker())
+        settings.THUMBNAIL_WORKERS = 2
+        post = Post.objects.create(text='Пост', author=user)
+        post.image.save('image.png', image_file())
+        thumbnails.worker.wait(timeout=10)
+        assert thumbnail_of(post) is not None
+
+    @needs_resize
+    @pytest.mark.django_db(transaction=True)
+    def test_generate_thumbnails_command(self, user):
+        post = Post.objects.create(text='Пост', author=user)
+        post.image.save('image.png', image_file())
+        default.kvstore.clear()
+        assert thumbnail_of(post) is None
+        call_command('generate_thumbnails')
+        assert thumbnail_of(post) is not None, \
+            'Проверьте, что `generate_thumbnails` собирает миниатюры существующих постов'
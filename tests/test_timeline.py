@@ -0,0 +1,57 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from posts.models import Follow, Post, TimelineEntry
+
+
+@pytest.fixture
+def author():
+    return get_user_model().objects.create_user(username='TimelineAuthor')
+
+
+class TestTimeline:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_backfills_and_new_post_is_pushed(self, user, author):
+        old_post = Post.objects.create(text='Старый пост', author=author)
+        Follow.objects.create(user=user, author=author)
+        assert TimelineEntry.objects.filter(user=user, post=old_post).exists(), \
+            'Проверьте, что при подписке лента заполняется старыми постами автора'
+
+        new_post = Post.objects.create(text='Новый пост', author=author)
+        entry = TimelineEntry.objects.get(user=user, post=new_post)
+        assert entry.pub_date == new_post.pub_date
+        assert entry.author == author
+
+    @pytest.mark.django_db(transaction=True)
+    def test_unfollow_prunes_timeline(self, user, author):
+        Post.objects.create(text='Пост', author=author)
+        Follow.objects.create(user=user, author=author)
+        Follow.objects.filter(user=user, author=author).delete()
+        assert not TimelineEntry.objects.filter(user=user).exists(), \
+            'Проверьте, что при отписке посты автора удаляются из ленты'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_index_reads_timeline(self, user_client, user, author):
+        Follow.objects.create(user=user, author=author)
+        Post.objects.bulk_create([Post(text='Без сигнала', author=author)])
+        response = user_client.get('/follow/')
+        assert len(response.context['page']) == 0
+
+        call_command('rebuild_timelines')
+        response = user_client.get('/follow/')
+        assert [post.text for post in response.context['page']] == ['Без сигнала'], \
+            'Проверьте, что `rebuild_timelines` восстанавливает ленту подписок'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_index_cursor_pages(self, user_client, user, author):
+        Follow.objects.create(user=user, author=author)
+        for i in range(15):
+            Post.objects.create(text=f'Пост {i}', author=author)
+        response = user_client.get('/follow/')
+        first = [post.text for post in response.context['page']]
+        cursor = response.context['page'].next_cursor
+        response = user_client.get(f'/follow/?cursor={cursor}')
+        second = [post.text for post in response.context['page']]
+        assert first + second == [f'Пост {i}' for i in reversed(range(15))]
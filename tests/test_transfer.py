@@ -0,0 +1,119 @@
+import datetime as dt
+import json
+import os
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+
+
+@pytest.fixture
+def content(user, group, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    os.makedirs(tmp_path / 'media' / 'posts')
+    (tmp_path / 'media' / 'posts' / 'cat.jpg').write_bytes(b'jpeg')
+    author = get_user_model().objects.create_user(username='Author')
+    post = Post.objects.create(
+        text='Перенос', author=author, group=group, image='posts/cat.jpg'
+    )
+    old = timezone.now() - dt.timedelta(days=30)
+    Post.objects.filter(pk=post.pk).update(pub_date=old)
+    Comment.objects.create(post=post, author=user, text='Комментарий')
+    Follow.objects.create(user=user, author=author)
+    return post, old
+
+
+class TestTransfer:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_and_import(self, content, tmp_path):
+        post, old = content
+        export_dir = tmp_path / 'export'
+        call_command('export_content', str(export_dir), '--media')
+        lines = (export_dir / 'posts.jsonl').read_text(encoding='utf-8').splitlines()
+        assert json.loads(lines[0])['author'] == 'Author'
+        assert (export_dir / 'media' / 'posts' / 'cat.jpg').exists(), \
+            'Проверьте, что `--media` копирует картинки постов'
+
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        get_user_model().objects.all().delete()
+        os.remove(tmp_path / 'media' / 'posts' / 'cat.jpg')
+
+        call_command('import_content', str(export_dir), '--media')
+        imported = Post.objects.get(pk=post.pk)
+        assert imported.text == 'Перенос'
+        assert imported.author.username == 'Author'
+        assert imported.group.slug == 'test-link'
+        assert imported.pub_date == old, \
+            'Проверьте, что импорт сохраняет даты публикации'
+        assert imported.comment_count == 1, \
+            'Проверьте, что после импорта пересчитываются счетчики'
+        assert Comment.objects.get().author.username == 'TestUser'
+        assert TimelineEntry.objects.filter(post=imported).exists(), \
+            'Проверьте, что после импорта пересобираются ленты подписок'
+        assert (tmp_path / 'media' / 'posts' / 'cat.jpg').exists()
+
+        with pytest.raises(CommandError):
+            call_command('import_content', str(export_dir))
+        assert Post.objects.count() == 1, \
+            'Проверьте, что повторный импорт не создает дубликаты'
+        created = Post.objects.create(text='После импорта', author=imported.author)
+        assert created.pk > imported.pk
+
+    @pytest.mark.django_db(transaction=True)
+    def test_import_into_filled_database(self, content, tmp_path):
+        post, old = content
+        export_dir = tmp_path / 'export'
+        call_command('export_content', str(export_dir))
+        Comment.objects.all().delete()
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        other = Post.objects.create(
+            pk=post.pk, text='Чужой пост', author=post.author
+        )
+        with pytest.raises(CommandError, match='posts'):
+            call_command('import_content', str(export_dir))
+        assert not Comment.objects.filter(post=other).exists(), \
+            'Проверьте, что комментарии не цепляются к чужому посту с тем же id'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_unknown_author(self, content, tmp_path):
+        export_dir = tmp_path / 'export'
+        call_command('export_content', str(export_dir))
+        (export_dir / 'users.jsonl').unlink()
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        get_user_model().objects.all().delete()
+        with pytest.raises(CommandError, match='Author.*остались'):
+            call_command('import_content', str(export_dir))
+        assert Group.objects.exists() and not Post.objects.exists(), \
+            'Проверьте, что загрузка фиксирует каждую пачку отдельно'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_import_with_existing_users(self, content, tmp_path):
+        post, old = content
+        export_dir = tmp_path / 'export'
+        call_command('export_content', str(export_dir))
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User = get_user_model()
+        User.objects.exclude(username='TestUser').delete()
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'secret')
+        reader = User.objects.get(username='TestUser')
+        password = reader.password
+
+        call_command('import_content', str(export_dir))
+        assert Post.objects.get(pk=post.pk).author.username == 'Author'
+        assert Comment.objects.get().author == reader, \
+            'Проверьте, что пользователи сопоставляются по username'
+        reader.refresh_from_db()
+        assert reader.password == password
+        assert User.objects.filter(pk=admin.pk).exists()
@@ -0,0 +1,77 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from posts.models import Post
+
+
+def image_file(name='image.png', size=(100, 60), fmt='png', mode='RGBA'):
+    file_obj = BytesIO()
+    Image.new(mode, size, (255, 0, 0)).save(file_obj, fmt)
+    return ContentFile(file_obj.getvalue(), name)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+class TestImageUploads:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_large_image_is_downscaled(self, settings, user_client):
+        settings.POST_IMAGE_MAX_SIDE = 500
+        user_client.post('/new', data={'text': 'Большая', 'image': image_file(size=(1200, 800))})
+        post = Post.objects.get(text='Большая')
+        assert post.image.name.endswith('.jpg'), \
+            'Проверьте, что картинка пережимается в JPEG'
+        with Image.open(post.image.path) as image:
+            assert image.size == (500, 333), \
+                'Проверьте, что картинка уменьшается до POST_IMAGE_MAX_SIDE'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_small_jpeg_is_kept(self, user_client):
+        upload = image_file('photo.jpg', fmt='jpeg', mode='RGB')
+        content = upload.read()
+        upload.seek(0)
+        user_client.post('/new', data={'text': 'Фото', 'image': upload})
+        post = Post.objects.get(text='Фото')
+        assert post.image.read() == content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_oversized_file_is_rejected(self, settings, user_client):
+        settings.UPLOAD_MAX_SIZE = 1024
+        response = user_client.post(
+            '/new', data={'text': 'Тяжелая', 'image': image_file(size=(500, 500), mode='RGB')}
+        )
+        assert response.status_code == 200
+        assert 'image' in response.context['form'].errors, \
+            'Проверьте, что файл больше UPLOAD_MAX_SIZE отклоняется с ошибкой'
+        assert not Post.objects.filter(text='Тяжелая').exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_too_many_pixels_are_rejected(self, settings, user_client):
+        settings.POST_IMAGE_MAX_PIXELS = 1000
+        response = user_client.post('/new', data={'text': 'Огромная', 'image': image_file()})
+        assert 'image' in response.context['form'].errors, \
+            'Проверьте, что картинка с огромным разрешением отклоняется до декодирования'
+        assert not Post.objects.filter(text='Огромная').exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_oversized_file_in_other_forms(self, settings, client, user):
+        settings.UPLOAD_MAX_SIZE = 1024
+        client.force_login(user)
+        user.is_staff = user.is_superuser = True
+        user.save()
+        response = client.post('/admin/posts/post/add/', data={
+            'text': 'Из админки',
+            'author': user.pk,
+            'comment_count': 0,
+            'image': image_file(size=(500, 500), mode='RGB'),
+        })
+        assert response.status_code == 200, \
+            'Проверьте, что большой файл в других формах дает ошибку, а не 500'
+        assert 'image' in response.context['adminform'].form.errors
+        assert not Post.objects.filter(text='Из админки').exists()
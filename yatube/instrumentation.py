@@ -0,0 +1,215 @@
+"""
+Замеры запросов: число и время SQL, повторяющиеся запросы (N+1),
+время шаблонов и всего обработчика.
+
+Включается через YATUBE_INSTRUMENT, см. settings. Запросы считаются
+через connection.execute_wrapper, поэтому DEBUG не нужен.
+"""
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+# Сколько последних запросов на вью держать в памяти
+WINDOW = 500
+# Как часто сбрасывать выборку воркера в общий кэш
+FLUSH_INTERVAL = 10
+# Выборка умершего воркера пропадает из отчета сама
+SNAPSHOT_TIMEOUT = 5 * 60
+# С какого числа одинаковых запросов считать их N+1
+DUPLICATE_THRESHOLD = 3
+SNAPSHOT_KEY = 'request-stats:{}'
+WORKERS_KEY = 'request-stats:workers'
+SQL_SAMPLE_LENGTH = 200
+
+_local = threading.local()
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+class RequestStats:
+    def __init__(self):
+        # Запросы могут приходить и из пула posts.concurrent
+        self.lock = threading.Lock()
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.sql_time += elapsed
+                self.queries[sql] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def duplicates(self):
+        """Одинаковый SQL с разными параметрами: типичный N+1."""
+        return {
+            sql: count for sql, count in self.queries.items()
+            if count >= DUPLICATE_THRESHOLD
+        }
+
+    def server_timing(self):
+        duplicates = sum(count for count in self.duplicates().values())
+        return ', '.join((
+            f'db;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.query_count} queries"',
+            f'dup;desc="{duplicates} repeated"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'app;dur={self.total_time * 1000:.1f}',
+        ))
+
+
+class Aggregate:
+    """Скользящая выборка по вью в памяти процесса."""
+
+    def __init__(self, window=WINDOW):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.duplicates = defaultdict(Counter)
+        self.flushed = time.monotonic()
+
+    def add(self, view, stats):
+        sample = (
+            stats.total_time * 1000,
+            stats.sql_time * 1000,
+            stats.template_time * 1000,
+            stats.query_count,
+        )
+        with self.lock:
+            self.samples[view].append(sample)
+            for sql, count in stats.duplicates().items():
+                self.duplicates[view][sql[:SQL_SAMPLE_LENGTH]] += count
+        if time.monotonic() - self.flushed > FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: {
+                    'samples': list(samples),
+                    'duplicates': dict(
+                        self.duplicates[view].most_common(5)
+                    ),
+                }
+                for view, samples in self.samples.items()
+            }
+
+    def flush(self):
+        """Кладет выборку воркера в общий кэш для команды request_stats."""
+        self.flushed = time.monotonic()
+        cache = caches['default']
+        pid = os.getpid()
+        cache.set(SNAPSHOT_KEY.format(pid), self.snapshot(), SNAPSHOT_TIMEOUT)
+        workers = cache.get(WORKERS_KEY) or []
+        if pid not in workers:
+            cache.set(WORKERS_KEY, workers + [pid], None)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.duplicates.clear()
+
+
+aggregate = Aggregate()
+
+
+def collect_snapshots():
+    """Выборки всех воркеров, которые успели сбросить их в кэш."""
+    cache = caches['default']
+    workers = cache.get(WORKERS_KEY) or []
+    snapshots = cache.get_many([SNAPSHOT_KEY.format(pid) for pid in workers])
+    return list(snapshots.values())
+
+
+def summarize(snapshots):
+    """Сводка по вью: процентили времени, SQL и самые частые повторы."""
+    samples = defaultdict(list)
+    duplicates = defaultdict(Counter)
+    for snapshot in snapshots:
+        for view, data in snapshot.items():
+            samples[view].extend(data['samples'])
+            duplicates[view].update(data['duplicates'])
+    summary = {}
+    for view, rows in samples.items():
+        total = sorted(row[0] for row in rows)
+        summary[view] = {
+            'requests': len(rows),
+            'p50_ms': total[len(total) // 2],
+            'p99_ms': total[min(len(total) - 1, len(total) * 99 // 100)],
+            'sql_ms': sum(row[1] for row in rows) / len(rows),
+            'template_ms': sum(row[2] for row in rows) / len(rows),
+            'queries': sum(row[3] for row in rows) / len(rows),
+            'max_queries': max(row[3] for row in rows),
+            'duplicates': dict(duplicates[view].most_common(3)),
+        }
+    return summary
+
+
+@contextmanager
+def record_queries(stats):
+    """Считает в stats запросы всех соединений потока (и пула fetch)."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(stats.record_query)
+            )
+        yield stats
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        _local.stats = stats
+        started = time.perf_counter()
+        try:
+            with record_queries(stats):
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        stats.total_time = time.perf_counter() - started
+        response['Server-Timing'] = stats.server_timing()
+        match = getattr(request, 'resolver_match', None)
+        aggregate.add(match.view_name if match else request.path, stats)
+        return response
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, который засекает время рендера страницы."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,112 @@
+"""
+Чтение лент с реплик.
+
+Реплики подключаются через YATUBE_REPLICAS, см. settings. GET-запросы
+к вью из REPLICA_VIEWS читают со случайной реплики, все остальное —
+из основной базы. Реплики отстают от нее не больше чем на REPLICA_LAG
+секунд. Автор записи столько же читает из основной базы по cookie,
+а страницы и фрагменты, собранные с реплики из лент, которые менялись
+за это время, не попадают в долгие кэши (см. posts.cache.get_versions).
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_local = threading.local()
+
+
+def reading_from_replica():
+    return getattr(_local, 'replica', False)
+
+
+@contextmanager
+def replica_reads(enabled=True, lagging=False):
+    """Чтения в блоке идут на реплики; так же пул posts.concurrent."""
+    previous = reading_from_replica(), replica_may_lag()
+    _local.replica, _local.lagging = enabled, lagging
+    try:
+        yield
+    finally:
+        _local.replica, _local.lagging = previous
+
+
+def note_written(timestamp):
+    """Запрос прочитал версию ленты, записанной в timestamp."""
+    if (timestamp is not None
+            and time.time() - timestamp < settings.REPLICA_LAG):
+        note_lag()
+
+
+def note_lag():
+    if reading_from_replica():
+        _local.lagging = True
+
+
+def replica_may_lag():
+    """
+    Запрос читал с реплики ленты, записанные меньше REPLICA_LAG назад:
+    собранное из них не стоит класть в долгие кэши.
+    """
+    return getattr(_local, 'lagging', False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Внутри транзакции читаем то, что в ней же записали
+        if (reading_from_replica() and settings.DATABASE_REPLICAS
+                and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return random.choice(settings.DATABASE_REPLICAS)
+        # Явно, иначе объект, прочитанный с реплики, тянул бы туда
+        # и запросы своих связей
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # И запись объекта, прочитанного с реплики
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Включает чтение с реплик для вью лент и липкость после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.replica = _local.lagging = False
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + settings.REPLICA_LAG),
+                max_age=settings.REPLICA_LAG, httponly=True
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and request.resolver_match.url_name in settings.REPLICA_VIEWS
+                and not self.sticky(request)):
+            _local.replica = True
+
+    @staticmethod
+    def sticky(request):
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
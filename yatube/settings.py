@@ -10,7 +10,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'u8fwyo_^!x8&g@uqzffbkpeq2c4!==rb1s8*ui23%hu3#8we(8'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# В продакшене: YATUBE_DEBUG=0
+DEBUG = os.environ.get('YATUBE_DEBUG', '1') != '0'
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'api',
     'sorl.thumbnail',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -42,23 +44,37 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yatube.routers.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# Без DEBUG шаблоны компилируются один раз на процесс,
+# см. yatube.templating.precompile_templates
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'posts.context_processors.feed_cache',
             ],
         },
     },
@@ -82,6 +98,26 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения лент, см. yatube.routers:
+# YATUBE_REPLICAS=/srv/yatube/replica1.sqlite3,/srv/yatube/replica2.sqlite3
+# Локально их наполняет manage.py sync_replicas
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+# GET-запросы к этим вью читают с реплик
+REPLICA_VIEWS = ['index', 'group', 'profile', 'post', 'follow_index']
+# Максимальное отставание реплик, секунды: столько после записи
+# чтения идут в основную базу
+REPLICA_LAG = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -127,3 +163,66 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Общий кэш для всех воркеров без внешних сервисов:
+# YATUBE_CACHE_PATH=/var/tmp/yatube/cache.sqlite3
+if os.environ.get('YATUBE_CACHE_PATH'):
+    CACHES['default'] = {
+        'BACKEND': 'yatube.cache_backends.SQLiteCache',
+        'LOCATION': os.environ['YATUBE_CACHE_PATH'],
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+
+FEED_CACHE_ALIAS = 'default'
+
+# Фрагменты лент версионируются и сбрасываются при записи,
+# поэтому в общем кэше могут жить долго. Версии в LocMemCache видит
+# только свой процесс: остальные воркеры отдают старые фрагменты,
+# пока те не истекут, — как прежний кэш главной на 20 секунд
+if CACHES[FEED_CACHE_ALIAS]['BACKEND'].endswith('.LocMemCache'):
+    FEED_CACHE_TIMEOUT = 20
+else:
+    FEED_CACHE_TIMEOUT = 60 * 60 * 6
+# Версия ленты подписок не меняется от правок и комментариев
+FOLLOW_FEED_CACHE_TIMEOUT = 20
+
+# Timelines
+
+TIMELINE_BACKEND = 'posts.timeline.DatabaseTimelineBackend'
+
+# Thumbnails
+
+# Миниатюры собираются в фоне, пока не готовы — показывается оригинал
+THUMBNAIL_BACKEND = 'posts.thumbnails.AsyncThumbnailBackend'
+THUMBNAIL_WORKERS = 2
+
+# Uploads
+
+# Загрузки всегда пишутся на диск кусками, больше лимита — отбрасываются
+FILE_UPLOAD_HANDLERS = ['posts.uploads.BoundedUploadHandler']
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+# Ограничение на декодирование: примерно 100 МБ памяти на RGBA
+POST_IMAGE_MAX_PIXELS = 25 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 2560
+POST_IMAGE_QUALITY = 85
+
+# Search
+
+SEARCH_BACKEND = 'posts.search.SQLiteSearchBackend'
+
+# Instrumentation
+
+# Число и время SQL-запросов, шаблонов и вью в заголовке Server-Timing
+# и в отчете manage.py request_stats: YATUBE_INSTRUMENT=1
+INSTRUMENTATION = bool(os.environ.get('YATUBE_INSTRUMENT'))
+if INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'yatube.instrumentation.InstrumentationMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'yatube.instrumentation.TimedDjangoTemplates'
+
+# Concurrent fetching
+
+# Потоки для независимых запросов профиля, группы и поста;
+# 0 — выполнять их по очереди в потоке запроса
+VIEW_FETCH_WORKERS = 4
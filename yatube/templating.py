@@ -0,0 +1,41 @@
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Имена всех .html шаблонов в каталогах загрузчиков движка."""
+    for loader in engine.engine.template_loaders:
+        # У кэширующего загрузчика каталоги знают вложенные загрузчики
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                for root, dirs, files in os.walk(directory):
+                    for filename in files:
+                        if filename.endswith('.html'):
+                            path = os.path.join(root, filename)
+                            yield os.path.relpath(path, directory)
+
+
+def precompile_templates():
+    """
+    Компилирует шаблоны при старте воркера, а не на первых запросах.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются в памяти
+    процесса. Возвращает число шаблонов.
+    """
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in set(template_names(engine)):
+            try:
+                engine.get_template(name.replace(os.sep, '/'))
+            except TemplateSyntaxError:
+                logger.exception('Не удалось скомпилировать шаблон %s', name)
+                continue
+            count += 1
+    return count